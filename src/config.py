@@ -20,6 +20,18 @@ LLM_DEFAULT_PROVIDER = os.getenv("LLM_DEFAULT_PROVIDER", LLM_PROVIDERS[0] if LLM
 OLLAMA_MODELS_STR = os.getenv("OLLAMA_MODELS", "")
 OLLAMA_MODELS = [m.strip() for m in OLLAMA_MODELS_STR.split(",") if m.strip()]
 
+# Semantic Cache Configuration
+# Backend: "qdrant" (shared across workers and restarts) or "memory" (per process)
+SEMANTIC_CACHE_BACKEND = os.getenv("SEMANTIC_CACHE_BACKEND", "qdrant")
+SEMANTIC_CACHE_COLLECTION = os.getenv("SEMANTIC_CACHE_COLLECTION", "llm_cache")
+SEMANTIC_CACHE_PURGE_INTERVAL = int(os.getenv("SEMANTIC_CACHE_PURGE_INTERVAL", "600"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "256"))
+
 # API Configuration
 API_HOST = os.getenv("API_HOST", "0.0.0.0")
 API_PORT = int(os.getenv("API_PORT", "8000"))
+API_RELOAD = os.getenv("DEV") == "1"
+API_WORKERS = int(os.getenv("WORKERS", "1"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
@@ -1,16 +1,65 @@
 """Dependency injection module for Fable RAG System"""
-from typing import Optional
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Optional, Union
+import asyncio
+import logging
 
+import numpy as np
+
+from src.config import (
+    SEMANTIC_CACHE_BACKEND, SEMANTIC_CACHE_COLLECTION,
+    SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL, SEMANTIC_CACHE_SIZE
+)
 from src.embeddings import EmbeddingModel
 from src.qdrant_manager import QdrantManager
+from src.semantic_cache import SemanticCache, QdrantSemanticCache
 from src.llm import Ollama, GeminiCLI, ClaudeCLI, CodexCLI
 
+log = logging.getLogger(__name__)
+
 # Global instances
 embedding_model: Optional[EmbeddingModel] = None
 qdrant_manager: Optional[QdrantManager] = None
 
 # LLM provider instances cache
-llm_providers_cache = {}
+llm_providers_cache: dict = {}
+
+# One lock per provider cache key so concurrent first requests build a
+# provider only once
+provider_init_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+# Generated answers cache, keyed by query embedding (in-memory until startup
+# switches to the Qdrant backend)
+semantic_cache: Union[SemanticCache, QdrantSemanticCache] = SemanticCache(
+    threshold=SEMANTIC_CACHE_THRESHOLD,
+    ttl=SEMANTIC_CACHE_TTL,
+    max_size=SEMANTIC_CACHE_SIZE
+)
+
+
+@lru_cache(maxsize=1024)
+def _embed_cached(query: str) -> tuple:
+    """Embed a query once per exact string; tuples keep cached vectors immutable"""
+    return tuple(embedding_model.encode_single(query).tolist())
+
+
+def embed_query(query: str) -> np.ndarray:
+    """
+    Embed a search query, reusing the vector for repeated queries
+
+    Args:
+        query: Query text
+
+    Returns:
+        Query vector
+    """
+    return np.asarray(_embed_cached(query), dtype=np.float32)
+
+
+def provider_cache_key(provider_name: str, ollama_model: Optional[str] = None) -> str:
+    """Key for a provider instance in llm_providers_cache (one per Ollama model)"""
+    return f"{provider_name}:{ollama_model}" if provider_name == "ollama" else provider_name
 
 
 def get_llm_provider(provider_name: str, ollama_model: Optional[str] = None):
@@ -29,14 +78,28 @@ def get_llm_provider(provider_name: str, ollama_model: Optional[str] = None):
 
 def init_dependencies():
     """Initialize all dependencies on startup"""
-    global embedding_model, qdrant_manager
+    global embedding_model, qdrant_manager, semantic_cache
 
     # Initialize embedding model
     embedding_model = EmbeddingModel()
+    _embed_cached.cache_clear()
 
     # Connect to Qdrant
     qdrant_manager = QdrantManager()
 
+    # Share cached answers across workers via Qdrant
+    if SEMANTIC_CACHE_BACKEND == "qdrant":
+        try:
+            semantic_cache = QdrantSemanticCache(
+                qdrant_manager,
+                collection_name=SEMANTIC_CACHE_COLLECTION,
+                vector_size=embedding_model.get_dimension(),
+                threshold=SEMANTIC_CACHE_THRESHOLD,
+                ttl=SEMANTIC_CACHE_TTL
+            )
+        except Exception as e:
+            log.warning("Qdrant semantic cache unavailable, using in-memory cache: %s", e)
+
     return embedding_model, qdrant_manager
 
 
@@ -18,12 +18,15 @@ class EmbeddingModel:
         model_name = os.getenv('EMBEDDING_MODEL', 'paraphrase-multilingual-MiniLM-L12-v2')
         print(f"Loading embedding model: {model_name}")
         self.model = SentenceTransformer(model_name)
+        if os.getenv('EMBEDDING_FP16', '0') == '1':
+            # Half precision halves weight memory and bandwidth per forward pass
+            self.model.half()
         self.dimension = self.model.get_sentence_embedding_dimension()
         print(f"✓ Model loaded, vector dimension: {self.dimension}")
 
     def encode(self, texts: List[str], show_progress: bool = True) -> np.ndarray:
         """
-        Convert texts to vectors
+        Convert texts to unit-length vectors (so dot product equals cosine similarity)
 
         Args:
             texts: List of texts
@@ -35,13 +38,14 @@ class EmbeddingModel:
         embeddings = self.model.encode(
             texts,
             show_progress_bar=show_progress,
-            convert_to_numpy=True
+            convert_to_numpy=True,
+            normalize_embeddings=True
         )
         return embeddings
 
     def encode_single(self, text: str) -> np.ndarray:
         """
-        Convert single text to vector
+        Convert single text to unit-length vector
 
         Args:
             text: Single text
@@ -49,7 +53,7 @@ class EmbeddingModel:
         Returns:
             Vector
         """
-        return self.model.encode(text, convert_to_numpy=True)
+        return self.model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
 
     def get_dimension(self) -> int:
         """Get vector dimension"""
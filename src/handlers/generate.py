@@ -1,26 +1,57 @@
 """Generate handler for Fable RAG System API"""
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+
+import orjson
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
 from src.config import COLLECTION_NAME, LLM_PROVIDERS, LLM_DEFAULT_PROVIDER, OLLAMA_MODELS
 import src.dependencies as deps
-from src.models import GenerateRequest, GenerateResponse, FableResult
+from src.llm import ClaudeCLI, Ollama
+from src.models import FABLE_PAYLOAD_FIELDS, GenerateRequest, GenerateResponse, FableResult
 
 router = APIRouter()
+log = logging.getLogger(__name__)
 
+# In-flight LLM generations, keyed by provider and prompt hash, so identical
+# concurrent requests share a single LLM call
+inflight: Dict[str, asyncio.Task] = {}
 
-@router.post("/generate", response_model=GenerateResponse, tags=["Generate"])
-async def generate_answer(request: GenerateRequest):
-    """
-    Generate answer using RAG (Retrieval-Augmented Generation)
+# Static instructions placed before any per-request text so providers can
+# cache the prompt prefix across requests
+SYSTEM_PREFIX = """You are a storyteller and teacher who answers questions using Aesop's fables.
 
-    - **query**: User question (e.g., "What can we learn about honesty?")
-    - **limit**: Number of fables to use as context (1-10, default 3)
-    - **provider**: LLM provider (ollama, claude_code, gemini_cli, codex)
-    - **ollama_model**: Model name for ollama (e.g., llama3.2:latest)
+You will be given a numbered set of fables retrieved for the user's question. Each fable has a
+title, its full content and its moral. Use them as follows:
+
+- Base your answer on the fables provided. Do not invent fables, characters or morals that are
+  not in the provided text.
+- Reference specific fables by title when they support your answer, and explain how the events
+  of the story illustrate the point.
+- When several fables are relevant, compare or combine their lessons rather than repeating them.
+- If none of the fables address the question, say so briefly and give the closest lesson the
+  fables do offer.
+- Answer in the same language as the user's question.
+- Keep the answer clear and concise: a short direct answer first, then supporting detail.
+
+"""
+
+
+# Prompt body templates, filled after a semantic cache miss
+FABLE_TMPL = "Fable {i}: {title}\nContent: {content}\nMoral: {moral}"
+PROMPT_TMPL = "Fables:\n\n{context}\n\nUser's question: {query}\n\nAnswer:"
+
+
+def _resolve_provider(request: GenerateRequest) -> Tuple[str, Optional[str], str, str]:
     """
-    if deps.embedding_model is None or deps.qdrant_manager is None:
-        raise HTTPException(status_code=503, detail="System not initialized yet")
+    Validate requested provider/model
 
+    Returns:
+        (provider_name, selected_model, cache_key, provider_info)
+    """
     # Determine provider
     provider_name = request.provider or LLM_DEFAULT_PROVIDER
     if provider_name not in LLM_PROVIDERS:
@@ -39,77 +70,327 @@ async def generate_answer(request: GenerateRequest):
                 detail=f"Model '{selected_model}' not available. Available: {OLLAMA_MODELS}"
             )
 
-    # Get or create LLM provider instance
-    cache_key = f"{provider_name}:{selected_model}" if provider_name == "ollama" else provider_name
-    if cache_key not in deps.llm_providers_cache:
-        try:
-            deps.llm_providers_cache[cache_key] = deps.get_llm_provider(provider_name, selected_model)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to initialize {provider_name}: {str(e)}")
+    cache_key = deps.provider_cache_key(provider_name, selected_model)
+
+    provider_info = provider_name
+    if provider_name == "ollama":
+        provider_info = f"ollama ({selected_model})"
+
+    return provider_name, selected_model, cache_key, provider_info
+
 
-    llm = deps.llm_providers_cache[cache_key]
+async def _get_llm(provider_name: str, selected_model: Optional[str], cache_key: str):
+    """Get or create LLM provider instance, initializing each provider once"""
+    if cache_key in deps.llm_providers_cache:
+        return deps.llm_providers_cache[cache_key]
+
+    async with deps.provider_init_locks[cache_key]:
+        if cache_key not in deps.llm_providers_cache:
+            try:
+                deps.llm_providers_cache[cache_key] = await asyncio.to_thread(
+                    deps.get_llm_provider, provider_name, selected_model
+                )
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Failed to initialize {provider_name}: {str(e)}")
+
+    return deps.llm_providers_cache[cache_key]
+
+
+def _cache_namespace(request: GenerateRequest, provider_name: str, cache_key: str) -> Optional[Tuple]:
+    """
+    Get the semantic cache partition for a request
+
+    Returns:
+        Namespace, or None when answers depend on session history and must
+        not be cached
+    """
+    if request.session_id is not None and provider_name == "ollama":
+        return None
+    return (cache_key, request.limit)
 
+
+async def _cache_lookup(cache_namespace, query_vector) -> Optional[dict]:
+    """Look up a cached answer, treating a cache backend failure as a miss"""
     try:
-        # Step 1: Search for relevant fables
-        query_vector = deps.embedding_model.encode_single(request.query)
-        results = deps.qdrant_manager.search(
-            collection_name=COLLECTION_NAME,
-            query_vector=query_vector.tolist(),
-            limit=request.limit
-        )
+        return await asyncio.to_thread(deps.semantic_cache.lookup, cache_namespace, query_vector)
+    except Exception as e:
+        log.warning("Semantic cache lookup failed: %s", e)
+        return None
 
-        # Step 2: Build context from fables
-        context_parts = []
-        for i, result in enumerate(results, 1):
-            payload = result['payload']
-            context_parts.append(
-                f"Fable {i}: {payload['title']}\n"
-                f"Content: {payload['content']}\n"
-                f"Moral: {payload['moral']}"
-            )
-        context = "\n\n".join(context_parts)
 
-        # Step 3: Build prompt for LLM
-        prompt = f"""Based on the following fables, answer the user's question.
+async def _cache_insert(cache_namespace, query_vector, answer: str, sources: List[FableResult]) -> None:
+    """Store a generated answer; a cache backend failure is logged, never raised"""
+    try:
+        await asyncio.to_thread(deps.semantic_cache.insert, cache_namespace, query_vector, answer, sources)
+    except Exception as e:
+        log.warning("Semantic cache insert failed: %s", e)
+
+
+async def _retrieve(request: GenerateRequest, cache_namespace) -> Tuple:
+    """
+    Embed the query, check the semantic cache and search for fables on a miss
+
+    Embedding and search run in worker threads so they overlap with
+    provider initialization.
+
+    Returns:
+        (query_vector, cached entry or None, search results or None)
+    """
+    query_vector = await asyncio.to_thread(deps.embed_query, request.query)
+
+    if cache_namespace is not None:
+        cached = await _cache_lookup(cache_namespace, query_vector)
+        if cached is not None:
+            return query_vector, cached, None
+
+    results = await asyncio.to_thread(
+        deps.qdrant_manager.search,
+        collection_name=COLLECTION_NAME,
+        query_vector=query_vector.tolist(),
+        limit=request.limit,
+        with_payload=FABLE_PAYLOAD_FIELDS
+    )
+    return query_vector, None, results
 
-{context}
 
-User's question: {request.query}
+async def _retrieve_with_llm(
+    request: GenerateRequest,
+    cache_namespace,
+    provider_name: str,
+    selected_model: Optional[str],
+    cache_key: str
+) -> Tuple:
+    """
+    Run retrieval and provider initialization concurrently
+
+    Both are always awaited. A provider failure only matters on a semantic
+    cache miss; a cached answer is served even if the provider is down.
+
+    Returns:
+        ((query_vector, cached entry or None, search results or None), llm or None)
+    """
+    retrieved, llm = await asyncio.gather(
+        _retrieve(request, cache_namespace),
+        _get_llm(provider_name, selected_model, cache_key),
+        return_exceptions=True
+    )
+    if isinstance(retrieved, BaseException):
+        raise retrieved
+    if isinstance(llm, BaseException):
+        if retrieved[1] is None:
+            raise llm
+        llm = None
+    return retrieved, llm
+
+
+def _build_prompt(results: List[dict], query: str) -> str:
+    """
+    Build LLM prompt body from retrieved fables
+
+    Fables are ordered by id so the same retrieval set always yields the
+    same text, and the user question goes last so everything before it
+    can be reused by provider-side prompt caching.
+    """
+    context = "\n\n".join(
+        FABLE_TMPL.format_map({"i": i, **result['payload']})
+        for i, result in enumerate(sorted(results, key=lambda r: r['id']), 1)
+    )
+    return PROMPT_TMPL.format_map({"context": context, "query": query})
+
+
+def _session_prompt(llm: Ollama, body: str, session_id: str) -> str:
+    """Prefix the prompt body on a session's first turn only; later turns already hold it in context"""
+    return body if llm.has_session(session_id) else SYSTEM_PREFIX + body
 
-Please provide a helpful answer based on the fables above. Reference specific fables when relevant."""
+
+async def _generate(llm, body: str, session_id: Optional[str] = None) -> Optional[str]:
+    """Run LLM generation with the static prefix in front of the prompt body"""
+    if isinstance(llm, ClaudeCLI):
+        # Claude takes the prefix as its system prompt so it is cached separately
+        return await llm.generate(body, system=SYSTEM_PREFIX)
+    if isinstance(llm, Ollama) and session_id is not None:
+        return await llm.generate(_session_prompt(llm, body, session_id), session_id=session_id)
+    return await llm.generate(SYSTEM_PREFIX + body)
+
+
+async def _generate_once(llm, cache_key: str, body: str, session_id: Optional[str] = None) -> Optional[str]:
+    """
+    Run LLM generation, coalescing identical concurrent requests
+
+    The first caller for a (provider, session, prompt) triple starts the LLM
+    call as a detached task; every caller, including later arrivals, awaits it
+    through asyncio.shield so one caller going away does not cancel it for
+    the others.
+    """
+    digest = hashlib.blake2b(body.encode(), digest_size=16).hexdigest()
+    key = f"{cache_key}:{digest}" if session_id is None else f"{cache_key}:{session_id}:{digest}"
+
+    # No await between lookup and insert, so this is atomic on the event loop
+    task = inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_generate(llm, body, session_id))
+        inflight[key] = task
+        task.add_done_callback(lambda done: _finish_inflight(key, done))
+
+    return await asyncio.shield(task)
+
+
+def _finish_inflight(key: str, task: asyncio.Task) -> None:
+    """Drop a finished generation from the in-flight table"""
+    if inflight.get(key) is task:
+        del inflight[key]
+    # Mark the exception retrieved in case every caller left before it finished
+    if not task.cancelled():
+        task.exception()
+
+
+def _format_sources(results: List[dict]) -> List[FableResult]:
+    """Convert search results to FableResult models"""
+    return [
+        FableResult(id=result['id'], score=result['score'], **result['payload'])
+        for result in results
+    ]
+
+
+def _json_response(response: GenerateResponse) -> ORJSONResponse:
+    """Encode a response once; FastAPI would otherwise dump, re-validate and dump it again"""
+    return ORJSONResponse(response.model_dump())
+
+
+def _sse(event: str, data) -> str:
+    """Encode a server-sent event with JSON data"""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
+@router.post("/generate", response_model=GenerateResponse, tags=["Generate"])
+async def generate_answer(request: GenerateRequest):
+    """
+    Generate answer using RAG (Retrieval-Augmented Generation)
+
+    - **query**: User question (e.g., "What can we learn about honesty?")
+    - **limit**: Number of fables to use as context (1-10, default 3)
+    - **provider**: LLM provider (ollama, claude_code, gemini_cli, codex)
+    - **ollama_model**: Model name for ollama (e.g., llama3.2:latest)
+    - **session_id**: Conversation id; ollama continues from the session's previous context
+    """
+    if deps.embedding_model is None or deps.qdrant_manager is None:
+        raise HTTPException(status_code=503, detail="System not initialized yet")
+
+    provider_name, selected_model, cache_key, provider_info = _resolve_provider(request)
+    cache_namespace = _cache_namespace(request, provider_name, cache_key)
+
+    try:
+        # Step 1: Search for relevant fables (or a cached answer for a
+        # semantically similar query) while the LLM provider initializes
+        (query_vector, cached, results), llm = await _retrieve_with_llm(
+            request, cache_namespace, provider_name, selected_model, cache_key
+        )
+
+        # Step 2: Reuse the cached answer
+        if cached is not None:
+            return _json_response(GenerateResponse(
+                query=request.query,
+                answer=cached["answer"],
+                sources=cached["sources"],
+                llm_provider=provider_info
+            ))
+
+        # Step 3: Build prompt for LLM from fables
+        prompt = _build_prompt(results, request.query)
 
         # Step 4: Generate answer using LLM
-        answer = llm.generate(prompt)
+        answer = await _generate_once(llm, cache_key, prompt, request.session_id)
 
         if answer is None:
             raise HTTPException(status_code=500, detail="LLM failed to generate response")
 
         # Step 5: Format sources
-        sources = [
-            FableResult(
-                id=result['id'],
-                title=result['payload']['title'],
-                content=result['payload']['content'],
-                moral=result['payload']['moral'],
-                score=result['score'],
-                language=result['payload']['language'],
-                word_count=result['payload']['word_count']
-            )
-            for result in results
-        ]
+        sources = _format_sources(results)
 
-        provider_info = provider_name
-        if provider_name == "ollama":
-            provider_info = f"ollama ({selected_model})"
+        if cache_namespace is not None:
+            await _cache_insert(cache_namespace, query_vector, answer, sources)
 
-        return GenerateResponse(
+        return _json_response(GenerateResponse(
             query=request.query,
             answer=answer,
             sources=sources,
             llm_provider=provider_info
+        ))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Generate failed: {str(e)}")
+
+
+@router.post("/generate/stream", tags=["Generate"])
+async def generate_answer_stream(request: GenerateRequest):
+    """
+    Generate answer using RAG, streamed as server-sent events
+
+    Emits a `sources` event with the retrieved fables, then `token` events
+    as the answer is generated, then `done` (or `error`). Ollama streams
+    token by token; CLI providers emit the full answer as a single token.
+    """
+    if deps.embedding_model is None or deps.qdrant_manager is None:
+        raise HTTPException(status_code=503, detail="System not initialized yet")
+
+    provider_name, selected_model, cache_key, provider_info = _resolve_provider(request)
+    cache_namespace = _cache_namespace(request, provider_name, cache_key)
+
+    try:
+        (query_vector, cached, results), llm = await _retrieve_with_llm(
+            request, cache_namespace, provider_name, selected_model, cache_key
         )
+        sources = cached["sources"] if cached is not None else _format_sources(results)
 
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Generate failed: {str(e)}")
+
+    async def token_iter() -> AsyncIterator[str]:
+        yield _sse("sources", {
+            "query": request.query,
+            "sources": [source.model_dump() for source in sources],
+            "llm_provider": provider_info
+        })
+
+        if cached is not None:
+            yield _sse("token", cached["answer"])
+            yield _sse("done", {})
+            return
+
+        prompt = _build_prompt(results, request.query)
+        tokens = []
+        if hasattr(llm, "agenerate"):
+            if isinstance(llm, Ollama) and request.session_id is not None:
+                stream = llm.agenerate(
+                    _session_prompt(llm, prompt, request.session_id), session_id=request.session_id
+                )
+            else:
+                stream = llm.agenerate(SYSTEM_PREFIX + prompt)
+            try:
+                async for token in stream:
+                    tokens.append(token)
+                    yield _sse("token", token)
+            except Exception as e:
+                # A partial answer must not be reported as done or cached
+                yield _sse("error", {"detail": f"LLM stream failed: {str(e)}"})
+                return
+        else:
+            answer = await _generate_once(llm, cache_key, prompt, request.session_id)
+            if answer is not None:
+                tokens.append(answer)
+                yield _sse("token", answer)
+
+        if not tokens:
+            yield _sse("error", {"detail": "LLM failed to generate response"})
+            return
+
+        if cache_namespace is not None:
+            await _cache_insert(cache_namespace, query_vector, "".join(tokens), sources)
+
+        yield _sse("done", {})
+
+    return StreamingResponse(token_iter(), media_type="text/event-stream")
@@ -1,9 +1,10 @@
 """Search handler for Fable RAG System API"""
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 
 from src.config import COLLECTION_NAME
 import src.dependencies as deps
-from src.models import SearchRequest, SearchResponse, FableResult
+from src.models import FABLE_PAYLOAD_FIELDS, SearchRequest, SearchResponse
 
 router = APIRouter()
 
@@ -22,35 +23,29 @@ async def search_fables(request: SearchRequest):
 
     try:
         # Vectorize query text
-        query_vector = deps.embedding_model.encode_single(request.query)
+        query_vector = deps.embed_query(request.query)
 
         # Search for similar vectors
         results = deps.qdrant_manager.search(
             collection_name=COLLECTION_NAME,
             query_vector=query_vector.tolist(),
             limit=request.limit,
-            score_threshold=request.score_threshold
+            score_threshold=request.score_threshold,
+            with_payload=FABLE_PAYLOAD_FIELDS
         )
 
-        # Format results
+        # Format results as plain dicts shaped like SearchResponse; returning a
+        # Response skips FastAPI's dump/validate/dump pass over response_model
         fable_results = [
-            FableResult(
-                id=result['id'],
-                title=result['payload']['title'],
-                content=result['payload']['content'],
-                moral=result['payload']['moral'],
-                score=result['score'],
-                language=result['payload']['language'],
-                word_count=result['payload']['word_count']
-            )
+            {"id": result['id'], "score": result['score'], **result['payload']}
             for result in results
         ]
 
-        return SearchResponse(
-            query=request.query,
-            results=fable_results,
-            total_results=len(fable_results)
-        )
+        return ORJSONResponse({
+            "query": request.query,
+            "results": fable_results,
+            "total_results": len(fable_results)
+        })
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
@@ -3,6 +3,7 @@ import json
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from qdrant_client.models import Distance
 from src.embeddings import EmbeddingModel
 from src.qdrant_manager import QdrantManager
 from tqdm import tqdm
@@ -39,9 +40,10 @@ def init_fables_collection():
     # Delete old collection if exists
     qdrant.delete_collection(COLLECTION_NAME)
 
-    # Create new collection
+    # Create new collection (embeddings are normalized, so dot product
+    # ranks like cosine without a per-comparison norm)
     vector_dim = embedding_model.get_dimension()
-    qdrant.create_collection(COLLECTION_NAME, vector_size=vector_dim)
+    qdrant.create_collection(COLLECTION_NAME, vector_size=vector_dim, distance=Distance.DOT)
 
     # 4. Generate vectors
     print("\n[4/5] Generating vectors...")
@@ -1,70 +1,77 @@
 """Claude CLI integration"""
-import subprocess
-import json
+import asyncio
+import logging
+import shutil
+import orjson
 from typing import Optional
 
+from .cli_runner import run_cli
+
+
+log = logging.getLogger(__name__)
+
 
 class ClaudeCLI:
     """Claude CLI wrapper for generation"""
 
+    _checked = False
+
     def __init__(self):
         """Initialize Claude CLI"""
         self._check_available()
 
-    def _check_available(self) -> bool:
-        """Check if Claude CLI is available"""
-        try:
-            subprocess.run(
-                ["which", "claude"],
-                capture_output=True,
-                check=True
-            )
+    @classmethod
+    def _check_available(cls) -> bool:
+        """Check if Claude CLI is available (result cached on the class)"""
+        if cls._checked:
             return True
-        except subprocess.CalledProcessError:
+        if shutil.which("claude") is None:
             raise RuntimeError("Claude CLI not found. Please install it first.")
+        cls._checked = True
+        return True
 
-    def generate(self, prompt: str, timeout: int = 60) -> Optional[str]:
+    async def generate(self, prompt: str, timeout: int = 60, system: Optional[str] = None) -> Optional[str]:
         """
         Generate response using Claude CLI
 
-        Command: claude -p "{prompt}" --output-format json
+        Command: claude -p "{prompt}" --output-format json [--system-prompt "{system}"]
 
         Args:
             prompt: Input prompt
             timeout: Timeout in seconds (default: 60)
+            system: System prompt (optional); keep it stable across calls so it can be cached
 
         Returns:
             Generated text or None if failed
         """
+        command = ["claude", "-p", prompt, "--output-format", "json"]
+        if system:
+            command += ["--system-prompt", system]
+
         try:
-            result = subprocess.run(
-                ["claude", "-p", prompt, "--output-format", "json"],
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
-
-            if result.returncode != 0:
-                print(f"✗ Claude CLI error: {result.stderr}")
+            returncode, stdout, stderr = await run_cli(command, timeout)
+
+            if returncode != 0:
+                log.error("Claude CLI error: %s", stderr.decode(errors='replace'))
                 return None
 
-            # Parse JSON output
+            # Parse JSON output straight from bytes
             try:
-                data = json.loads(result.stdout)
+                data = orjson.loads(stdout)
                 # Extract text from JSON response
                 if isinstance(data, dict):
                     # Claude CLI returns {"result": "...", "type": "result", ...}
                     return data.get("result", data.get("text", data.get("content", str(data))))
                 return str(data)
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 # If not JSON, return raw output
-                return result.stdout.strip()
+                return stdout.decode(errors="replace").strip()
 
-        except subprocess.TimeoutExpired:
-            print(f"✗ Claude CLI timeout after {timeout}s")
+        except TimeoutError:
+            log.error("Claude CLI timeout after %ss", timeout)
             return None
         except Exception as e:
-            print(f"✗ Claude CLI error: {e}")
+            log.error("Claude CLI error: %s", e)
             return None
 
 
@@ -74,7 +81,7 @@ if __name__ == '__main__':
 
     try:
         claude = ClaudeCLI()
-        response = claude.generate("Tell me a very short story about honesty in one sentence.")
+        response = asyncio.run(claude.generate("Tell me a very short story about honesty in one sentence."))
 
         if response:
             print(f"✓ Claude response:\n{response}\n")
@@ -0,0 +1,46 @@
+"""Shared asyncio subprocess runner for CLI-based LLM integrations"""
+import asyncio
+import contextlib
+import os
+from typing import List, Tuple
+
+# Caps concurrent CLI subprocesses across all providers
+cli_semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+
+# Max bytes per line when reading CLI output incrementally (asyncio default is 64 KiB)
+STREAM_LIMIT = 16 * 1024 * 1024
+
+
+async def run_cli(command: List[str], timeout: int) -> Tuple[int, bytes, bytes]:
+    """
+    Run a CLI command without blocking the event loop
+
+    Args:
+        command: Executable and arguments
+        timeout: Timeout in seconds; the process is killed when exceeded
+
+    Returns:
+        (return code, stdout bytes, stderr bytes)
+
+    Raises:
+        TimeoutError: If the command does not finish within timeout
+
+    The process is killed if the call times out, is cancelled or fails.
+    """
+    async with cli_semaphore:
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        finally:
+            # Timeout, cancellation or any other error must not leave the child
+            # running outside the semaphore's cap
+            if process.returncode is None:
+                with contextlib.suppress(ProcessLookupError):
+                    process.kill()
+                await process.wait()
+
+        return process.returncode, stdout, stderr
@@ -1,38 +1,69 @@
 """Codex CLI integration"""
-import subprocess
+import asyncio
+import logging
+import contextlib
+import shutil
 import json
 from typing import Optional
 
+from .cli_runner import cli_semaphore, STREAM_LIMIT
+
+
+log = logging.getLogger(__name__)
+
 
 class CodexCLI:
     """Codex CLI wrapper for generation"""
 
+    _checked = False
+
     def __init__(self):
         """Initialize Codex CLI"""
         self._check_available()
 
-    def _check_available(self) -> bool:
-        """Check if Codex CLI is available"""
-        try:
-            subprocess.run(
-                ["which", "codex"],
-                capture_output=True,
-                check=True
-            )
-            subprocess.run(
-                ["which", "jq"],
-                capture_output=True,
-                check=True
-            )
+    @classmethod
+    def _check_available(cls) -> bool:
+        """Check if Codex CLI is available (result cached on the class)"""
+        if cls._checked:
             return True
-        except subprocess.CalledProcessError:
-            raise RuntimeError("Codex CLI or jq not found. Please install them first.")
+        if shutil.which("codex") is None:
+            raise RuntimeError("Codex CLI not found. Please install it first.")
+        cls._checked = True
+        return True
+
+    def _extract_text(self, item: dict) -> str:
+        """Extract message text from a codex agent_message item"""
+        if "content" in item:
+            # Handle content array
+            content = item["content"]
+            if isinstance(content, list) and len(content) > 0:
+                return content[0].get("text", str(content[0]))
+        return item.get("text", str(item))
+
+    async def _read_agent_message(self, stdout: asyncio.StreamReader) -> Optional[str]:
+        """Read codex JSON events until the first agent message"""
+        async for line in stdout:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
 
-    def generate(self, prompt: str, timeout: int = 60) -> Optional[str]:
+            if not isinstance(event, dict):
+                continue
+            item = event.get("item", {})
+            if event.get("type") == "item.completed" and item.get("type") == "agent_message":
+                return self._extract_text(item)
+
+        return None
+
+    async def generate(self, prompt: str, timeout: int = 60) -> Optional[str]:
         """
         Generate response using Codex CLI
 
-        Command: codex exec "{prompt}" --json 2>/dev/null | jq 'select(.type=="item.completed" and .item.type=="agent_message")'
+        Command: codex exec "{prompt}" --json 2>/dev/null
+
+        The JSON event stream is filtered in-process for the first
+        item.completed event whose item is an agent_message.
 
         Args:
             prompt: Input prompt
@@ -42,51 +73,39 @@ class CodexCLI:
             Generated text or None if failed
         """
         try:
-            # Use codex with --json flag and pipe to jq
-            codex_process = subprocess.Popen(
-                ["codex", "exec", prompt, "--json"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.DEVNULL,
-                text=True
-            )
-
-            jq_process = subprocess.Popen(
-                ["jq", 'select(.type=="item.completed" and .item.type=="agent_message")'],
-                stdin=codex_process.stdout,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.DEVNULL,
-                text=True
-            )
-
-            codex_process.stdout.close()
-            output, _ = jq_process.communicate(timeout=timeout)
-
-            if jq_process.returncode != 0:
-                print("✗ Codex CLI error")
+            async with cli_semaphore:
+                codex_process = await asyncio.create_subprocess_exec(
+                    "codex", "exec", prompt, "--json",
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL,
+                    limit=STREAM_LIMIT
+                )
+
+                try:
+                    message = await asyncio.wait_for(
+                        self._read_agent_message(codex_process.stdout), timeout
+                    )
+                except TimeoutError:
+                    log.error("Codex CLI timeout after %ss", timeout)
+                    return None
+                finally:
+                    # Nothing after the agent message is needed, so codex is
+                    # killed rather than waited on; timeout, cancellation or a
+                    # read error (e.g. a line over STREAM_LIMIT) must not leave
+                    # it running either
+                    if codex_process.returncode is None:
+                        with contextlib.suppress(ProcessLookupError):
+                            codex_process.kill()
+                        await codex_process.wait()
+
+            if message is None:
+                log.error("Codex CLI error: no agent message in output")
                 return None
 
-            # Parse JSON output
-            try:
-                data = json.loads(output)
-                # Extract message from codex response
-                if isinstance(data, dict) and "item" in data:
-                    item = data["item"]
-                    if "content" in item:
-                        # Handle content array
-                        content = item["content"]
-                        if isinstance(content, list) and len(content) > 0:
-                            return content[0].get("text", str(content[0]))
-                    return item.get("text", str(item))
-                return str(data)
-            except json.JSONDecodeError:
-                # If not JSON, return raw output
-                return output.strip()
+            return message
 
-        except subprocess.TimeoutExpired:
-            print(f"✗ Codex CLI timeout after {timeout}s")
-            return None
         except Exception as e:
-            print(f"✗ Codex CLI error: {e}")
+            log.error("Codex CLI error: %s", e)
             return None
 
 
@@ -96,7 +115,7 @@ if __name__ == '__main__':
 
     try:
         codex = CodexCLI()
-        response = codex.generate("Tell me a very short story about honesty in one sentence.")
+        response = asyncio.run(codex.generate("Tell me a very short story about honesty in one sentence."))
 
         if response:
             print(f"✓ Codex response:\n{response}\n")
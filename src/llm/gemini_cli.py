@@ -1,12 +1,21 @@
 """Gemini CLI integration"""
-import subprocess
-import json
+import asyncio
+import logging
+import shutil
+import orjson
 from typing import Optional
 
+from .cli_runner import run_cli
+
+
+log = logging.getLogger(__name__)
+
 
 class GeminiCLI:
     """Gemini CLI wrapper for generation"""
 
+    _checked = False
+
     def __init__(self, model: str = "pro"):
         """
         Initialize Gemini CLI
@@ -17,19 +26,17 @@ class GeminiCLI:
         self.model = model
         self._check_available()
 
-    def _check_available(self) -> bool:
-        """Check if Gemini CLI is available"""
-        try:
-            subprocess.run(
-                ["which", "gemini"],
-                capture_output=True,
-                check=True
-            )
+    @classmethod
+    def _check_available(cls) -> bool:
+        """Check if Gemini CLI is available (result cached on the class)"""
+        if cls._checked:
             return True
-        except subprocess.CalledProcessError:
+        if shutil.which("gemini") is None:
             raise RuntimeError("Gemini CLI not found. Please install it first.")
+        cls._checked = True
+        return True
 
-    def generate(self, prompt: str, timeout: int = 60) -> Optional[str]:
+    async def generate(self, prompt: str, timeout: int = 60) -> Optional[str]:
         """
         Generate response using Gemini CLI
 
@@ -43,35 +50,32 @@ class GeminiCLI:
             Generated text or None if failed
         """
         try:
-            result = subprocess.run(
+            returncode, stdout, _ = await run_cli(
                 ["gemini", "-p", prompt, "-o", "json", "--model", self.model],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.DEVNULL,
-                text=True,
-                timeout=timeout
+                timeout
             )
 
-            if result.returncode != 0:
-                print(f"✗ Gemini CLI error: return code {result.returncode}")
+            if returncode != 0:
+                log.error("Gemini CLI error: return code %s", returncode)
                 return None
 
-            # Parse JSON output
+            # Parse JSON output straight from bytes
             try:
-                data = json.loads(result.stdout)
+                data = orjson.loads(stdout)
                 # Extract text from JSON response
                 if isinstance(data, dict):
                     # Gemini CLI returns {"response": "...", "stats": {...}}
                     return data.get("response", data.get("text", data.get("content", str(data))))
                 return str(data)
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 # If not JSON, return raw output
-                return result.stdout.strip()
+                return stdout.decode(errors="replace").strip()
 
-        except subprocess.TimeoutExpired:
-            print(f"✗ Gemini CLI timeout after {timeout}s")
+        except TimeoutError:
+            log.error("Gemini CLI timeout after %ss", timeout)
             return None
         except Exception as e:
-            print(f"✗ Gemini CLI error: {e}")
+            log.error("Gemini CLI error: %s", e)
             return None
 
 
@@ -81,7 +85,7 @@ if __name__ == '__main__':
 
     try:
         gemini = GeminiCLI()
-        response = gemini.generate("Tell me a very short story about honesty in one sentence.")
+        response = asyncio.run(gemini.generate("Tell me a very short story about honesty in one sentence."))
 
         if response:
             print(f"✓ Gemini response:\n{response}\n")
@@ -1,11 +1,26 @@
 """Ollama Python SDK integration for local LLM"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
 import ollama
-from typing import Optional, List, Dict
+from typing import AsyncIterator, Optional, List, Dict
+
+
+log = logging.getLogger(__name__)
 
 
 class Ollama:
     """Ollama wrapper for local LLM generation"""
 
+    # Model list shared by all instances, refreshed after MODELS_TTL seconds
+    MODELS_TTL = 30
+    _models: List[Dict[str, str]] = []
+    _models_ts = float("-inf")
+
+    # Sessions whose context is kept before the least recently used is dropped
+    MAX_SESSIONS = 256
+
     def __init__(self, model: Optional[str] = None):
         """
         Initialize Ollama
@@ -13,7 +28,11 @@ class Ollama:
         Args:
             model: Model to use (if None, will use first available model)
         """
-        self.available_models = self.list_models()
+        self.available_models = self._cached_models()
+
+        if model and model not in [m["name"] for m in self.available_models]:
+            # The model may have been pulled since the list was cached
+            self.available_models = self._cached_models(refresh=True)
 
         if model:
             if model not in [m["name"] for m in self.available_models]:
@@ -24,7 +43,35 @@ class Ollama:
         else:
             raise RuntimeError("No models available. Please pull a model first: ollama pull <model>")
 
-    def list_models(self) -> List[Dict[str, str]]:
+        # One async client per instance so generations reuse its connection pool
+        self._client = ollama.AsyncClient()
+
+        # Token context returned by the last generation of each session
+        self._ctx_by_session: OrderedDict = OrderedDict()
+
+    @classmethod
+    def _cached_models(cls, refresh: bool = False) -> List[Dict[str, str]]:
+        """
+        Get available models, querying the Ollama daemon at most once per TTL
+
+        Args:
+            refresh: Ignore the cached list and query the daemon
+
+        Returns:
+            List of available models with name and size info
+        """
+        if not refresh and time.monotonic() - cls._models_ts < cls.MODELS_TTL:
+            return cls._models
+
+        models = cls.list_models()
+        # Failed or empty listings are not cached so a daemon coming up is seen
+        if models:
+            cls._models = models
+            cls._models_ts = time.monotonic()
+        return models
+
+    @classmethod
+    def list_models(cls) -> List[Dict[str, str]]:
         """
         List available models from Ollama
 
@@ -38,7 +85,7 @@ class Ollama:
             for model in response.models:
                 models.append({
                     "name": model.model,
-                    "size": self._format_size(model.size),
+                    "size": cls._format_size(model.size),
                     "modified_at": str(model.modified_at),
                     "family": model.details.family if model.details else ""
                 })
@@ -46,10 +93,11 @@ class Ollama:
             return models
 
         except Exception as e:
-            print(f"✗ Ollama list error: {e}")
+            log.error("Ollama list error: %s", e)
             return []
 
-    def _format_size(self, size_bytes: int) -> str:
+    @staticmethod
+    def _format_size(size_bytes: int) -> str:
         """Format bytes to human readable size"""
         for unit in ["B", "KB", "MB", "GB"]:
             if size_bytes < 1024:
@@ -75,27 +123,99 @@ class Ollama:
             raise ValueError(f"Model '{model}' not found. Available: {[m['name'] for m in self.available_models]}")
         self.model = model
 
-    def generate(self, prompt: str) -> Optional[str]:
+    def has_session(self, session_id: str) -> bool:
+        """Check whether a session has context from a previous generation"""
+        return session_id in self._ctx_by_session
+
+    def _session_kwargs(self, session_id: Optional[str]) -> Dict:
+        """Build context arguments continuing a session, if any"""
+        if session_id is None:
+            return {}
+        return {"context": self._ctx_by_session.get(session_id)}
+
+    def _store_context(self, session_id: Optional[str], context: Optional[List[int]]) -> None:
+        """Remember a session's context, evicting the least recently used session"""
+        if session_id is None or not context:
+            return
+        self._ctx_by_session[session_id] = context
+        self._ctx_by_session.move_to_end(session_id)
+        while len(self._ctx_by_session) > self.MAX_SESSIONS:
+            self._ctx_by_session.popitem(last=False)
+
+    async def generate(self, prompt: str, session_id: Optional[str] = None) -> Optional[str]:
         """
-        Generate response using Ollama
+        Generate response using Ollama's async client
 
         Args:
             prompt: Input prompt
+            session_id: Conversation id; continues from the session's previous
+                context so earlier turns are not prefilled again
 
         Returns:
             Generated text or None if failed
         """
         try:
-            response = ollama.generate(
+            response = await self._client.generate(
                 model=self.model,
-                prompt=prompt
+                prompt=prompt,
+                **self._session_kwargs(session_id)
             )
+            self._store_context(session_id, response.get("context"))
             return response.get("response", None)
 
         except Exception as e:
-            print(f"✗ Ollama error: {e}")
+            log.error("Ollama error: %s", e)
             return None
 
+    async def agenerate(self, prompt: str, session_id: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream response tokens using Ollama's async client
+
+        Args:
+            prompt: Input prompt
+            session_id: Conversation id; continues from the session's previous context
+
+        Yields:
+            Generated text chunks
+
+        Raises:
+            Exception: If the stream fails, so callers never mistake a partial
+                answer for a complete one
+        """
+        try:
+            stream = await self._client.generate(
+                model=self.model,
+                prompt=prompt,
+                stream=True,
+                **self._session_kwargs(session_id)
+            )
+            async for chunk in stream:
+                token = chunk.get("response")
+                if token:
+                    yield token
+                # The final chunk carries the context for the whole exchange
+                self._store_context(session_id, chunk.get("context"))
+
+        except Exception as e:
+            log.error("Ollama stream error: %s", e)
+            raise
+
+    async def load(self) -> bool:
+        """
+        Load the model into memory so the first real generation skips the load stall
+
+        Returns:
+            Whether the model was loaded
+        """
+        try:
+            # An empty prompt makes Ollama load the model without generating
+            await self._client.generate(model=self.model, prompt="")
+            return True
+
+        except Exception as e:
+            log.error("Ollama load error: %s", e)
+            return False
+
     def chat(self, messages: List[Dict[str, str]]) -> Optional[str]:
         """
         Chat with the model (multi-turn conversation)
@@ -114,7 +234,7 @@ class Ollama:
             return response.get("message", {}).get("content", None)
 
         except Exception as e:
-            print(f"✗ Ollama chat error: {e}")
+            log.error("Ollama chat error: %s", e)
             return None
 
 
@@ -133,7 +253,7 @@ if __name__ == '__main__':
         print()
 
         # Test generation
-        response = oll.generate("Tell me a very short story about honesty in one sentence.")
+        response = asyncio.run(oll.generate("Tell me a very short story about honesty in one sentence."))
 
         if response:
             print(f"✓ Ollama ({oll.model}) response:\n{response}\n")
@@ -1,17 +1,31 @@
 """FastAPI application: Fable RAG System API - Entrypoint"""
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from typing import Optional
+import asyncio
+import contextlib
+import logging
 import os
 
-from src.config import COLLECTION_NAME, LLM_PROVIDERS, LLM_DEFAULT_PROVIDER, OLLAMA_MODELS, API_HOST, API_PORT
+from src.config import (
+    COLLECTION_NAME, LLM_PROVIDERS, LLM_DEFAULT_PROVIDER, OLLAMA_MODELS, API_HOST, API_PORT,
+    API_RELOAD, API_WORKERS, LOG_LEVEL, SEMANTIC_CACHE_PURGE_INTERVAL
+)
 from src.dependencies import init_dependencies, qdrant_manager
 from src.handlers import router
+import src.dependencies as deps
+
+# Route module loggers (e.g. LLM provider errors) to stderr
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+log = logging.getLogger(__name__)
 
 # Create FastAPI application
 app = FastAPI(
     title="Fable RAG API",
     description="Fable Story Retrieval-Augmented Generation System API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Setup CORS
@@ -28,10 +42,52 @@ app.add_middleware(
 app.include_router(router)
 
 
+# Provider warm-up at startup
+async def warm_llm_providers():
+    """Create configured LLM providers up front so the first request skips their setup"""
+    for provider_name in LLM_PROVIDERS:
+        model = OLLAMA_MODELS[0] if provider_name == "ollama" and OLLAMA_MODELS else None
+        try:
+            llm = await asyncio.to_thread(deps.get_llm_provider, provider_name, model)
+        except Exception as e:
+            log.warning("Could not initialize LLM provider %s: %s", provider_name, e)
+            continue
+
+        deps.llm_providers_cache[deps.provider_cache_key(provider_name, model)] = llm
+        if provider_name == "ollama":
+            await llm.load()
+
+
+# Background task purging expired semantic cache entries
+purge_task: Optional[asyncio.Task] = None
+
+
+async def purge_semantic_cache():
+    """Periodically drop expired semantic cache entries"""
+    while True:
+        await asyncio.sleep(SEMANTIC_CACHE_PURGE_INTERVAL)
+        try:
+            await asyncio.to_thread(deps.semantic_cache.purge_expired)
+        except Exception as e:
+            log.error("Semantic cache purge failed: %s", e)
+
+
+async def stop_purge_task():
+    """Cancel the purge task, if running, and wait for it to finish"""
+    global purge_task
+    if purge_task is None:
+        return
+    task, purge_task = purge_task, None
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+
+
 # Lifecycle events
 @app.on_event("startup")
 async def startup_event():
     """Initialize model and connections on application startup"""
+    global purge_task
     print("🚀 Initializing Fable RAG System...")
 
     # Initialize dependencies
@@ -50,6 +106,13 @@ async def startup_event():
     print(f"  Default provider: {LLM_DEFAULT_PROVIDER}")
     if "ollama" in LLM_PROVIDERS and OLLAMA_MODELS:
         print(f"  Ollama models: {', '.join(OLLAMA_MODELS)}")
+    await warm_llm_providers()
+    print(f"✓ Warmed LLM providers: {', '.join(deps.llm_providers_cache) or 'none'}")
+
+    # Start periodic purge of expired cached answers
+    print(f"✓ Semantic cache: {type(deps.semantic_cache).__name__}")
+    await stop_purge_task()
+    purge_task = asyncio.create_task(purge_semantic_cache())
 
     print("✓ System startup complete!")
 
@@ -59,13 +122,20 @@ async def shutdown_event():
     """Cleanup on application shutdown"""
     print("👋 Shutting down system...")
 
+    await stop_purge_task()
+
 
 if __name__ == "__main__":
     import uvicorn
 
+    # "auto" picks uvloop/httptools when installed (uvicorn[standard]) and falls
+    # back to asyncio/h11 otherwise; reload is for development only
     uvicorn.run(
         "src.main:app",
         host=API_HOST,
         port=API_PORT,
-        reload=True
+        reload=API_RELOAD,
+        workers=API_WORKERS,
+        loop="auto",
+        http="auto"
     )
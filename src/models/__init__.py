@@ -1,10 +1,11 @@
 """Models package for Fable RAG System API"""
 from .requests import SearchRequest, GenerateRequest
-from .responses import FableResult, SearchResponse, HealthResponse, GenerateResponse
+from .responses import FABLE_PAYLOAD_FIELDS, FableResult, SearchResponse, HealthResponse, GenerateResponse
 
 __all__ = [
     "SearchRequest",
     "GenerateRequest",
+    "FABLE_PAYLOAD_FIELDS",
     "FableResult",
     "SearchResponse",
     "HealthResponse",
@@ -16,3 +16,6 @@ class GenerateRequest(BaseModel):
     limit: int = Field(3, ge=1, le=10, description="Number of fables to use as context")
     provider: Optional[str] = Field(None, description="LLM provider: ollama, claude_code, gemini_cli, codex")
     ollama_model: Optional[str] = Field(None, description="Model name (required for ollama, e.g., llama3.2:latest)")
+    session_id: Optional[str] = Field(
+        None, description="Conversation id (ollama): follow-up questions continue from the previous answer's context"
+    )
@@ -1,10 +1,13 @@
 """Response models for Fable RAG System API"""
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List
 
 
 class FableResult(BaseModel):
     """Single fable result model"""
+    # Immutable so sources can be shared between responses and the semantic cache
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     id: int
     title: str
     content: str
@@ -14,6 +17,10 @@ class FableResult(BaseModel):
     word_count: int
 
 
+# Payload fields read into FableResult (id and score come from the search hit)
+FABLE_PAYLOAD_FIELDS = [name for name in FableResult.model_fields if name not in ("id", "score")]
+
+
 class SearchResponse(BaseModel):
     """Search response model"""
     query: str
@@ -1,7 +1,7 @@
 """Qdrant database management module"""
 from qdrant_client import QdrantClient
 from qdrant_client.models import Distance, VectorParams, PointStruct
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 import uuid
 import os
 from dotenv import load_dotenv
@@ -130,7 +130,8 @@ class QdrantManager:
         collection_name: str,
         query_vector: List[float],
         limit: int = 5,
-        score_threshold: Optional[float] = None
+        score_threshold: Optional[float] = None,
+        with_payload: Union[bool, List[str]] = True
     ) -> List[Dict]:
         """
         Search similar vectors
@@ -140,6 +141,7 @@ class QdrantManager:
             query_vector: Query vector
             limit: Number of results to return
             score_threshold: Score threshold (optional)
+            with_payload: Payload fields to return (True for all)
 
         Returns:
             List of search results
@@ -149,7 +151,8 @@ class QdrantManager:
                 collection_name=collection_name,
                 query_vector=query_vector,
                 limit=limit,
-                score_threshold=score_threshold
+                score_threshold=score_threshold,
+                with_payload=with_payload
             )
 
             return [
@@ -0,0 +1,252 @@
+"""Semantic cache module: Reuse LLM answers for semantically similar queries"""
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+import itertools
+import json
+import threading
+import time
+import uuid
+
+import numpy as np
+from qdrant_client.models import (
+    Distance, FieldCondition, Filter, FilterSelector, MatchValue, PayloadSchemaType, PointStruct, Range
+)
+
+from src.models import FableResult
+
+
+class SemanticCache:
+    """
+    In-memory, embedding-keyed LRU cache of generated answers
+
+    Methods are called from worker threads (request handlers and the purge
+    task), so every public method holds an internal lock.
+    """
+
+    def __init__(self, threshold: float = 0.92, ttl: int = 3600, max_size: int = 256):
+        """
+        Initialize semantic cache
+
+        Args:
+            threshold: Minimum cosine similarity to count as a hit
+            ttl: Entry lifetime in seconds
+            max_size: Maximum entries per namespace before LRU eviction
+        """
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._namespaces: Dict[Hashable, OrderedDict] = {}
+        self._matrices: Dict[Hashable, tuple] = {}
+        self._ids = itertools.count()
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        """Convert vector to a unit-length float32 array"""
+        vec = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def _matrix(self, namespace: Hashable) -> tuple:
+        """Get (entry ids, stacked vectors) for a namespace, rebuilding if stale"""
+        cached = self._matrices.get(namespace)
+        if cached is None:
+            entries = self._namespaces[namespace]
+            ids = list(entries.keys())
+            matrix = np.stack([entries[i]["vec"] for i in ids])
+            cached = self._matrices[namespace] = (ids, matrix)
+        return cached
+
+    def _evict_expired(self, namespace: Hashable, now: float) -> None:
+        """Drop entries older than the TTL"""
+        entries = self._namespaces[namespace]
+        expired = [i for i, e in entries.items() if now - e["ts"] >= self.ttl]
+        for entry_id in expired:
+            del entries[entry_id]
+        if expired:
+            self._matrices.pop(namespace, None)
+
+    def lookup(self, namespace: Hashable, vector) -> Optional[Dict[str, Any]]:
+        """
+        Find the most similar cached entry
+
+        Args:
+            namespace: Cache partition (e.g. provider/model)
+            vector: Query embedding
+
+        Returns:
+            Cached entry with answer and sources, or None on miss
+        """
+        query = self._normalize(vector)
+        with self._lock:
+            if namespace not in self._namespaces:
+                return None
+
+            self._evict_expired(namespace, time.monotonic())
+            entries = self._namespaces[namespace]
+            if not entries:
+                return None
+
+            ids, matrix = self._matrix(namespace)
+            scores = np.dot(matrix, query)
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+
+            entry_id = ids[best]
+            entries.move_to_end(entry_id)
+            return entries[entry_id]
+
+    def insert(self, namespace: Hashable, vector, answer: str, sources: List[Any]) -> None:
+        """
+        Store a generated answer
+
+        Args:
+            namespace: Cache partition (e.g. provider/model)
+            vector: Query embedding
+            answer: Generated answer
+            sources: Fables used as context
+        """
+        vec = self._normalize(vector)
+        with self._lock:
+            entries = self._namespaces.setdefault(namespace, OrderedDict())
+            entries[next(self._ids)] = {
+                "vec": vec,
+                "answer": answer,
+                "sources": sources,
+                "ts": time.monotonic(),
+            }
+            while len(entries) > self.max_size:
+                entries.popitem(last=False)
+            self._matrices.pop(namespace, None)
+
+    def purge_expired(self) -> None:
+        """Drop expired entries from every namespace"""
+        with self._lock:
+            now = time.monotonic()
+            for namespace in list(self._namespaces):
+                self._evict_expired(namespace, now)
+
+    def clear(self) -> None:
+        """Remove all cached entries"""
+        with self._lock:
+            self._namespaces.clear()
+            self._matrices.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(entries) for entries in self._namespaces.values())
+
+
+class QdrantSemanticCache:
+    """Semantic cache stored in a Qdrant collection, shared across workers and restarts"""
+
+    def __init__(
+        self,
+        qdrant_manager,
+        collection_name: str,
+        vector_size: int,
+        threshold: float = 0.92,
+        ttl: int = 3600
+    ):
+        """
+        Initialize Qdrant-backed semantic cache, creating its collection if missing
+
+        Args:
+            qdrant_manager: Connected QdrantManager
+            collection_name: Auxiliary collection holding cache entries
+            vector_size: Query embedding dimension
+            threshold: Minimum similarity to count as a hit (query vectors are
+                unit length, so the dot product equals cosine similarity)
+            ttl: Entry lifetime in seconds
+        """
+        self.client = qdrant_manager.client
+        self.collection_name = collection_name
+        self.threshold = threshold
+        self.ttl = ttl
+
+        if not self.client.collection_exists(collection_name):
+            qdrant_manager.create_collection(collection_name, vector_size, distance=Distance.DOT)
+            self.client.create_payload_index(collection_name, "namespace", PayloadSchemaType.KEYWORD)
+            self.client.create_payload_index(collection_name, "ts", PayloadSchemaType.FLOAT)
+
+    @staticmethod
+    def _namespace_key(namespace: Hashable) -> str:
+        """Serialize a namespace to a payload keyword"""
+        return json.dumps(namespace)
+
+    def lookup(self, namespace: Hashable, vector) -> Optional[Dict[str, Any]]:
+        """
+        Find the most similar unexpired cached entry
+
+        Args:
+            namespace: Cache partition (e.g. provider/model)
+            vector: Query embedding
+
+        Returns:
+            Cached entry with answer and sources, or None on miss
+        """
+        hits = self.client.search(
+            collection_name=self.collection_name,
+            query_vector=np.asarray(vector, dtype=np.float32).tolist(),
+            query_filter=Filter(must=[
+                FieldCondition(key="namespace", match=MatchValue(value=self._namespace_key(namespace))),
+                FieldCondition(key="ts", range=Range(gte=time.time() - self.ttl)),
+            ]),
+            limit=1,
+            score_threshold=self.threshold
+        )
+        if not hits:
+            return None
+
+        payload = hits[0].payload
+        return {
+            "answer": payload["answer"],
+            "sources": [FableResult(**source) for source in payload["sources"]],
+            "ts": payload["ts"],
+        }
+
+    def insert(self, namespace: Hashable, vector, answer: str, sources: List[Any]) -> None:
+        """
+        Store a generated answer
+
+        Args:
+            namespace: Cache partition (e.g. provider/model)
+            vector: Query embedding
+            answer: Generated answer
+            sources: Fables used as context
+        """
+        self.client.upsert(
+            collection_name=self.collection_name,
+            points=[
+                PointStruct(
+                    id=str(uuid.uuid4()),
+                    vector=np.asarray(vector, dtype=np.float32).tolist(),
+                    payload={
+                        "namespace": self._namespace_key(namespace),
+                        "answer": answer,
+                        "sources": [source.model_dump() for source in sources],
+                        "ts": time.time(),
+                    }
+                )
+            ]
+        )
+
+    def purge_expired(self) -> None:
+        """Delete entries older than the TTL"""
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=FilterSelector(filter=Filter(must=[
+                FieldCondition(key="ts", range=Range(lt=time.time() - self.ttl))
+            ]))
+        )
+
+    def clear(self) -> None:
+        """Remove all cached entries"""
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=FilterSelector(filter=Filter())
+        )
+
+    def __len__(self) -> int:
+        return self.client.count(collection_name=self.collection_name).count
@@ -158,3 +158,23 @@ def mock_env_vars(monkeypatch):
             monkeypatch.setenv(key, str(value))
 
     return _set_env
+
+
+@pytest.fixture(autouse=True)
+def fresh_semantic_cache():
+    """Give each test an empty in-memory semantic cache and undo any swaps it makes"""
+    import src.dependencies as deps
+    from src.semantic_cache import SemanticCache
+    original = deps.semantic_cache
+    deps.semantic_cache = SemanticCache()
+    yield
+    deps.semantic_cache = original
+
+
+@pytest.fixture(autouse=True)
+def clear_embedding_cache():
+    """Keep memoized query vectors from leaking between tests"""
+    import src.dependencies as deps
+    deps._embed_cached.cache_clear()
+    yield
+    deps._embed_cached.cache_clear()
@@ -1,6 +1,7 @@
 """Unit tests for dependencies module"""
 
 import pytest
+import numpy as np
 from unittest.mock import patch, MagicMock
 
 
@@ -88,6 +89,73 @@ class TestInitDependencies:
         assert emb == mock_emb
         assert qdrant == mock_qdrant
 
+    @patch('src.dependencies.QdrantSemanticCache')
+    @patch('src.dependencies.EmbeddingModel')
+    @patch('src.dependencies.QdrantManager')
+    def test_init_dependencies_qdrant_semantic_cache(self, mock_qdrant_cls, mock_emb_cls, mock_cache_cls):
+        """Test semantic cache switches to the Qdrant backend on init"""
+        import src.dependencies as deps
+
+        mock_emb_cls.return_value.get_dimension.return_value = 384
+
+        deps.init_dependencies()
+
+        assert deps.semantic_cache is mock_cache_cls.return_value
+        assert mock_cache_cls.call_args[0][0] is mock_qdrant_cls.return_value
+        assert mock_cache_cls.call_args[1]['vector_size'] == 384
+
+    @patch('src.dependencies.QdrantSemanticCache')
+    @patch('src.dependencies.EmbeddingModel')
+    @patch('src.dependencies.QdrantManager')
+    def test_init_dependencies_semantic_cache_fallback(self, mock_qdrant_cls, mock_emb_cls, mock_cache_cls, caplog):
+        """Test in-memory semantic cache is kept when Qdrant cache setup fails"""
+        import src.dependencies as deps
+        original = deps.semantic_cache
+
+        mock_cache_cls.side_effect = Exception("Qdrant unavailable")
+
+        deps.init_dependencies()
+
+        assert deps.semantic_cache is original
+        assert "Qdrant semantic cache unavailable, using in-memory cache: Qdrant unavailable" in caplog.text
+
+
+class TestEmbedQuery:
+    """Test embed_query memoization"""
+
+    def test_embed_query_reuses_vector(self):
+        """Test repeated queries skip the embedding model"""
+        import src.dependencies as deps
+        original = deps.embedding_model
+        deps.embedding_model = MagicMock()
+        deps.embedding_model.encode_single.return_value = np.array([0.5, 0.25], dtype=np.float32)
+
+        try:
+            first = deps.embed_query("honesty")
+            second = deps.embed_query("honesty")
+            deps.embedding_model.encode_single.assert_called_once_with("honesty")
+        finally:
+            deps.embedding_model = original
+
+        assert first.dtype == np.float32
+        assert second.tolist() == [0.5, 0.25]
+        assert first is not second
+
+    def test_embed_query_distinct_queries(self):
+        """Test different query strings are embedded separately"""
+        import src.dependencies as deps
+        original = deps.embedding_model
+        deps.embedding_model = MagicMock()
+        deps.embedding_model.encode_single.return_value = np.zeros(2)
+
+        try:
+            deps.embed_query("honesty")
+            deps.embed_query("patience")
+            deps.embed_query("honesty")
+            assert deps.embedding_model.encode_single.call_count == 2
+        finally:
+            deps.embedding_model = original
+
 
 class TestGetEmbeddingModel:
     """Test get_embedding_model function"""
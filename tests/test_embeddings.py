@@ -42,6 +42,29 @@ class TestEmbeddingModel:
         assert embedding_model.dimension == 384
         assert embedding_model.model == mock_model
 
+    @patch('src.embeddings.SentenceTransformer')
+    def test_init_full_precision_by_default(self, mock_transformer):
+        """Test model weights stay fp32 unless EMBEDDING_FP16 is set"""
+        mock_model = MagicMock()
+        mock_model.get_sentence_embedding_dimension.return_value = 384
+        mock_transformer.return_value = mock_model
+
+        EmbeddingModel()
+
+        mock_model.half.assert_not_called()
+
+    @patch('src.embeddings.SentenceTransformer')
+    @patch.dict('os.environ', {'EMBEDDING_FP16': '1'})
+    def test_init_fp16(self, mock_transformer):
+        """Test EMBEDDING_FP16=1 converts the model to half precision"""
+        mock_model = MagicMock()
+        mock_model.get_sentence_embedding_dimension.return_value = 384
+        mock_transformer.return_value = mock_model
+
+        EmbeddingModel()
+
+        mock_model.half.assert_called_once()
+
     @patch('src.embeddings.SentenceTransformer')
     def test_encode_multiple_texts(self, mock_transformer):
         """Test encoding multiple texts"""
@@ -62,7 +85,8 @@ class TestEmbeddingModel:
         mock_model.encode.assert_called_once_with(
             texts,
             show_progress_bar=False,
-            convert_to_numpy=True
+            convert_to_numpy=True,
+            normalize_embeddings=True
         )
         np.testing.assert_array_equal(result, expected_embeddings)
         assert result.shape == (3, 384)
@@ -84,7 +108,7 @@ class TestEmbeddingModel:
         result = embedding_model.encode_single(text)
 
         # Assert
-        mock_model.encode.assert_called_once_with(text, convert_to_numpy=True)
+        mock_model.encode.assert_called_once_with(text, convert_to_numpy=True, normalize_embeddings=True)
         np.testing.assert_array_equal(result, expected_embedding)
         assert result.shape == (384,)
 
@@ -108,7 +132,8 @@ class TestEmbeddingModel:
         mock_model.encode.assert_called_once_with(
             texts,
             show_progress_bar=False,
-            convert_to_numpy=True
+            convert_to_numpy=True,
+            normalize_embeddings=True
         )
         assert result.shape == (0, 384)
 
@@ -132,7 +157,8 @@ class TestEmbeddingModel:
         mock_model.encode.assert_called_once_with(
             texts,
             show_progress_bar=False,
-            convert_to_numpy=True
+            convert_to_numpy=True,
+            normalize_embeddings=True
         )
         assert result.shape == (1, 384)
 
@@ -172,6 +198,7 @@ class TestEmbeddingModel:
         mock_model.encode.assert_called_once_with(
             texts,
             show_progress_bar=False,
-            convert_to_numpy=True
+            convert_to_numpy=True,
+            normalize_embeddings=True
         )
         assert result.shape == (2, 384)
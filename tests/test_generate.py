@@ -1,8 +1,9 @@
 """Unit tests for generate handler"""
 
 import pytest
+import json
 import numpy as np
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from fastapi.testclient import TestClient
 from src.main import app
 
@@ -45,7 +46,7 @@ def mock_qdrant_manager():
 def mock_llm():
     """Mock LLM provider"""
     mock = MagicMock()
-    mock.generate.return_value = "This is a generated response based on the fables."
+    mock.generate = AsyncMock(return_value="This is a generated response based on the fables.")
     return mock
 
 
@@ -89,6 +90,138 @@ class TestGenerateEndpoint:
 
         assert response.status_code == 200
 
+    def test_generate_semantic_cache_hit(self, client, mock_embedding_model, mock_qdrant_manager, mock_llm):
+        """Test repeated query is served from the semantic cache"""
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+        deps.llm_providers_cache = {"ollama:llama3.1:8b": mock_llm}
+
+        first = client.post("/generate", json={"query": "Tell me about honesty", "limit": 3})
+        second = client.post("/generate", json={"query": "Tell me about honesty!", "limit": 3})
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert second.json()['query'] == "Tell me about honesty!"
+        assert second.json()['answer'] == first.json()['answer']
+        assert second.json()['sources'] == first.json()['sources']
+        mock_llm.generate.assert_called_once()
+        mock_qdrant_manager.search.assert_called_once()
+        assert mock_qdrant_manager.search.call_args[1]['with_payload'] == [
+            'title', 'content', 'moral', 'language', 'word_count'
+        ]
+
+    def test_generate_semantic_cache_separates_limit(self, client, mock_embedding_model, mock_qdrant_manager, mock_llm):
+        """Test cached answers are not reused across different context limits"""
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+        deps.llm_providers_cache = {"ollama:llama3.1:8b": mock_llm}
+
+        client.post("/generate", json={"query": "test", "limit": 3})
+        client.post("/generate", json={"query": "test", "limit": 5})
+
+        assert mock_llm.generate.call_count == 2
+
+    def test_generate_cache_lookup_error_is_miss(self, client, mock_embedding_model, mock_qdrant_manager, mock_llm, caplog):
+        """Test a failing cache lookup falls through to search and generation"""
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+        deps.llm_providers_cache = {"ollama:llama3.1:8b": mock_llm}
+        deps.semantic_cache = MagicMock()
+        deps.semantic_cache.lookup.side_effect = Exception("qdrant down")
+
+        response = client.post("/generate", json={"query": "honesty"})
+
+        assert response.status_code == 200
+        assert response.json()["answer"] == mock_llm.generate.return_value
+        mock_qdrant_manager.search.assert_called_once()
+        assert "Semantic cache lookup failed: qdrant down" in caplog.text
+
+    def test_generate_cache_insert_error_keeps_answer(self, client, mock_embedding_model, mock_qdrant_manager, mock_llm, caplog):
+        """Test a failing cache insert still returns the generated answer"""
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+        deps.llm_providers_cache = {"ollama:llama3.1:8b": mock_llm}
+        deps.semantic_cache = MagicMock()
+        deps.semantic_cache.lookup.return_value = None
+        deps.semantic_cache.insert.side_effect = Exception("qdrant down")
+
+        response = client.post("/generate", json={"query": "honesty"})
+
+        assert response.status_code == 200
+        assert response.json()["answer"] == mock_llm.generate.return_value
+        deps.semantic_cache.insert.assert_called_once()
+        assert "Semantic cache insert failed: qdrant down" in caplog.text
+
+    def test_generate_prompt_layout(self, client, mock_embedding_model, mock_qdrant_manager, mock_llm):
+        """Test static prefix comes first, fables ordered by id, question last"""
+        import src.dependencies as deps
+        from src.handlers.generate import SYSTEM_PREFIX
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+        deps.qdrant_manager.search.return_value = [
+            {'id': 7, 'score': 0.9, 'payload': {
+                'title': 'Second', 'content': 'B', 'moral': 'b', 'language': 'en', 'word_count': 1}},
+            {'id': 2, 'score': 0.8, 'payload': {
+                'title': 'First', 'content': 'A', 'moral': 'a', 'language': 'en', 'word_count': 1}},
+        ]
+        deps.llm_providers_cache = {"ollama:llama3.1:8b": mock_llm}
+
+        client.post("/generate", json={"query": "Why be honest?", "limit": 2})
+
+        prompt = mock_llm.generate.call_args[0][0]
+        assert prompt.startswith(SYSTEM_PREFIX)
+        assert prompt.index("Fable 1: First") < prompt.index("Fable 2: Second")
+        assert prompt.endswith("User's question: Why be honest?\n\nAnswer:")
+
+    def test_generate_prompt_keeps_braces_in_query(self, client, mock_embedding_model, mock_qdrant_manager, mock_llm):
+        """Test template filling does not interpret braces in the user's query"""
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+        deps.llm_providers_cache = {"ollama:llama3.1:8b": mock_llm}
+
+        response = client.post("/generate", json={"query": "What about {title}?", "limit": 3})
+
+        assert response.status_code == 200
+        assert mock_llm.generate.call_args[0][0].endswith("User's question: What about {title}?\n\nAnswer:")
+
+    def test_generate_cache_hit_skips_prompt_build(self, client, mock_embedding_model, mock_qdrant_manager, mock_llm):
+        """Test the prompt is only built on a semantic cache miss"""
+        import src.dependencies as deps
+        import src.handlers.generate as generate_module
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+        deps.llm_providers_cache = {"ollama:llama3.1:8b": mock_llm}
+
+        with patch.object(generate_module, '_build_prompt', wraps=generate_module._build_prompt) as build:
+            client.post("/generate", json={"query": "test", "limit": 3})
+            client.post("/generate", json={"query": "test", "limit": 3})
+
+        build.assert_called_once()
+
+    def test_generate_claude_system_prompt(self, client, mock_embedding_model, mock_qdrant_manager):
+        """Test Claude receives the static prefix as its system prompt"""
+        import src.dependencies as deps
+        from src.handlers.generate import SYSTEM_PREFIX
+        from src.llm import ClaudeCLI
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+
+        claude = MagicMock(spec=ClaudeCLI)
+        claude.generate.return_value = "Claude answer"
+        deps.llm_providers_cache = {"claude_code": claude}
+
+        response = client.post("/generate", json={"query": "test", "provider": "claude_code"})
+
+        assert response.json()['answer'] == "Claude answer"
+        prompt = claude.generate.call_args[0][0]
+        assert not prompt.startswith(SYSTEM_PREFIX)
+        assert claude.generate.call_args[1] == {"system": SYSTEM_PREFIX}
+
     def test_generate_not_initialized(self, client):
         """Test generate when system not initialized"""
         import src.dependencies as deps
@@ -147,6 +280,37 @@ class TestGenerateEndpoint:
         assert response.status_code == 500
         assert "Failed to initialize" in response.json()['detail']
 
+    def test_generate_cache_hit_survives_llm_init_error(self, client, mock_embedding_model, mock_qdrant_manager, mock_llm):
+        """Test a cached answer is served even when the provider fails to initialize"""
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+        deps.llm_providers_cache = {"ollama:llama3.1:8b": mock_llm}
+        first = client.post("/generate", json={"query": "test", "limit": 3})
+
+        deps.llm_providers_cache = {}
+        with patch.object(deps, 'get_llm_provider', side_effect=Exception("Init failed")):
+            response = client.post("/generate", json={"query": "test", "limit": 3})
+            stream = client.post("/generate/stream", json={"query": "test", "limit": 3})
+
+        assert response.status_code == 200
+        assert response.json()['answer'] == first.json()['answer']
+        assert parse_sse(stream.text)[1:] == [("token", first.json()['answer']), ("done", {})]
+
+    def test_generate_llm_init_error_awaits_retrieval(self, client, mock_embedding_model, mock_qdrant_manager):
+        """Test retrieval still runs to completion when the provider fails on a cache miss"""
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+        deps.llm_providers_cache = {}
+
+        with patch.object(deps, 'get_llm_provider', side_effect=Exception("Init failed")):
+            response = client.post("/generate", json={"query": "test", "limit": 3})
+
+        assert response.status_code == 500
+        assert "Failed to initialize" in response.json()['detail']
+        mock_qdrant_manager.search.assert_called_once()
+
     def test_generate_llm_returns_none(self, client, mock_embedding_model, mock_qdrant_manager):
         """Test generate when LLM returns None"""
         import src.dependencies as deps
@@ -154,7 +318,7 @@ class TestGenerateEndpoint:
         deps.qdrant_manager = mock_qdrant_manager
 
         mock_llm = MagicMock()
-        mock_llm.generate.return_value = None
+        mock_llm.generate = AsyncMock(return_value=None)
         deps.llm_providers_cache = {"ollama:llama3.1:8b": mock_llm}
 
         with patch.object(deps, 'get_llm_provider', return_value=mock_llm):
@@ -183,6 +347,32 @@ class TestGenerateEndpoint:
         assert response.status_code == 500
         assert "failed" in response.json()['detail'].lower()
 
+    def test_generate_overlaps_retrieval_and_provider_init(self, client, mock_qdrant_manager, mock_llm):
+        """Test query embedding runs while the provider is being initialized"""
+        import threading
+        import src.dependencies as deps
+        provider_started = threading.Event()
+
+        def init_provider(provider_name, model):
+            provider_started.set()
+            return mock_llm
+
+        def encode_single(text):
+            # Only completes if provider init is running concurrently
+            assert provider_started.wait(timeout=5)
+            return np.random.rand(384)
+
+        deps.embedding_model = MagicMock()
+        deps.embedding_model.encode_single.side_effect = encode_single
+        deps.qdrant_manager = mock_qdrant_manager
+        deps.llm_providers_cache = {}
+
+        with patch.object(deps, 'get_llm_provider', side_effect=init_provider):
+            response = client.post("/generate", json={"query": "test", "limit": 3})
+
+        assert response.status_code == 200
+        assert deps.llm_providers_cache["ollama:llama3.1:8b"] is mock_llm
+
     def test_generate_empty_query(self, client):
         """Test generate with empty query"""
         response = client.post("/generate", json={
@@ -219,3 +409,413 @@ class TestGenerateEndpoint:
             "limit": 11
         })
         assert response.status_code == 422
+
+
+class TestGenerateSession:
+    """Test Ollama session context reuse through /generate"""
+
+    @pytest.fixture
+    def session_llm(self):
+        """Mock Ollama provider that tracks sessions"""
+        from src.llm import Ollama
+        sessions = set()
+
+        async def generate(prompt, session_id=None):
+            sessions.add(session_id)
+            return "Session answer"
+
+        mock = MagicMock(spec=Ollama)
+        mock.has_session.side_effect = lambda session_id: session_id in sessions
+        mock.generate = AsyncMock(side_effect=generate)
+        return mock
+
+    def test_session_followup_skips_prefix(self, client, mock_embedding_model, mock_qdrant_manager, session_llm):
+        """Test the static prefix is only sent on a session's first turn"""
+        from src.handlers.generate import SYSTEM_PREFIX
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+        deps.llm_providers_cache = {"ollama:llama3.1:8b": session_llm}
+
+        first = client.post("/generate", json={"query": "honesty", "session_id": "s1"})
+        second = client.post("/generate", json={"query": "and greed?", "session_id": "s1"})
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        first_call, second_call = session_llm.generate.call_args_list
+        assert first_call.args[0].startswith(SYSTEM_PREFIX)
+        assert first_call.kwargs == {"session_id": "s1"}
+        assert second_call.args[0].startswith("Fables:")
+        assert second_call.kwargs == {"session_id": "s1"}
+
+    def test_session_bypasses_semantic_cache(self, client, mock_embedding_model, mock_qdrant_manager, session_llm):
+        """Test session answers are neither served from nor stored in the semantic cache"""
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+        deps.llm_providers_cache = {"ollama:llama3.1:8b": session_llm}
+
+        client.post("/generate", json={"query": "honesty", "session_id": "s1"})
+        client.post("/generate", json={"query": "honesty", "session_id": "s1"})
+
+        assert session_llm.generate.await_count == 2
+        assert len(deps.semantic_cache) == 0
+
+    def test_session_stream(self, client, mock_embedding_model, mock_qdrant_manager):
+        """Test streaming passes the session to Ollama's agenerate"""
+        from src.llm import Ollama
+        from src.handlers.generate import SYSTEM_PREFIX
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+
+        calls = []
+
+        async def agenerate(prompt, session_id=None):
+            calls.append((prompt, session_id))
+            yield "Honesty"
+
+        session_llm = MagicMock(spec=Ollama)
+        session_llm.has_session.return_value = False
+        session_llm.agenerate = agenerate
+        deps.llm_providers_cache = {"ollama:llama3.1:8b": session_llm}
+
+        response = client.post("/generate/stream", json={"query": "honesty", "session_id": "s1"})
+
+        assert parse_sse(response.text)[1:] == [("token", "Honesty"), ("done", {})]
+        assert calls[0][0].startswith(SYSTEM_PREFIX)
+        assert calls[0][1] == "s1"
+        assert len(deps.semantic_cache) == 0
+
+    def test_session_ignored_for_cli_providers(self, client, mock_embedding_model, mock_qdrant_manager, mock_llm):
+        """Test non-Ollama providers keep the full prompt and semantic cache"""
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+        deps.llm_providers_cache = {"codex": mock_llm}
+
+        with patch('src.handlers.generate.LLM_PROVIDERS', ["ollama", "codex"]):
+            response = client.post("/generate", json={"query": "honesty", "provider": "codex", "session_id": "s1"})
+
+        assert response.status_code == 200
+        assert mock_llm.generate.call_args.kwargs == {}
+        assert len(deps.semantic_cache) == 1
+
+
+def parse_sse(body):
+    """Parse server-sent event stream into (event, data) pairs"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestGenerateStreamEndpoint:
+    """Test streaming generate endpoint"""
+
+    def test_stream_ollama_tokens(self, client, mock_embedding_model, mock_qdrant_manager):
+        """Test tokens are streamed from providers with agenerate"""
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+
+        async def agenerate(prompt):
+            for token in ["Honesty", " pays"]:
+                yield token
+
+        mock_llm = MagicMock()
+        mock_llm.agenerate = agenerate
+        deps.llm_providers_cache = {"ollama:llama3.1:8b": mock_llm}
+
+        response = client.post("/generate/stream", json={"query": "honesty", "limit": 3})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = parse_sse(response.text)
+        assert events[0][0] == "sources"
+        assert events[0][1]["sources"][0]["title"] == "The Boy Who Cried Wolf"
+        assert events[1:] == [("token", "Honesty"), ("token", " pays"), ("done", {})]
+        mock_llm.generate.assert_not_called()
+
+    def test_stream_cli_provider(self, client, mock_embedding_model, mock_qdrant_manager):
+        """Test CLI providers emit the whole answer as one token"""
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+
+        mock_llm = MagicMock(spec=["generate"])
+        mock_llm.generate = AsyncMock(return_value="Full answer")
+        deps.llm_providers_cache = {"codex": mock_llm}
+
+        response = client.post("/generate/stream", json={"query": "honesty", "provider": "codex"})
+
+        events = parse_sse(response.text)
+        assert [e[0] for e in events] == ["sources", "token", "done"]
+        assert events[1][1] == "Full answer"
+
+    def test_stream_llm_failure(self, client, mock_embedding_model, mock_qdrant_manager):
+        """Test error event when LLM produces nothing"""
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+
+        mock_llm = MagicMock(spec=["generate"])
+        mock_llm.generate = AsyncMock(return_value=None)
+        deps.llm_providers_cache = {"codex": mock_llm}
+
+        response = client.post("/generate/stream", json={"query": "honesty", "provider": "codex"})
+
+        events = parse_sse(response.text)
+        assert events[-1] == ("error", {"detail": "LLM failed to generate response"})
+        assert len(deps.semantic_cache) == 0
+
+    def test_stream_interrupted_not_cached(self, client, mock_embedding_model, mock_qdrant_manager, mock_llm):
+        """Test a stream failing after a token emits error and caches nothing"""
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+
+        async def agenerate(prompt):
+            yield "The fox "
+            raise ConnectionError("Connection reset")
+
+        stream_llm = MagicMock()
+        stream_llm.agenerate = agenerate
+        deps.llm_providers_cache = {"ollama:llama3.1:8b": stream_llm}
+
+        response = client.post("/generate/stream", json={"query": "honesty"})
+
+        events = parse_sse(response.text)
+        assert events[1:] == [
+            ("token", "The fox "),
+            ("error", {"detail": "LLM stream failed: Connection reset"})
+        ]
+        assert len(deps.semantic_cache) == 0
+
+        # The next request generates a fresh answer rather than the partial one
+        deps.llm_providers_cache = {"ollama:llama3.1:8b": mock_llm}
+        followup = client.post("/generate", json={"query": "honesty"})
+        assert followup.json()["answer"] == mock_llm.generate.return_value
+
+    def test_stream_uses_semantic_cache(self, client, mock_embedding_model, mock_qdrant_manager, mock_llm):
+        """Test streamed answer is cached and reused by /generate"""
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+
+        streaming_llm = MagicMock(spec=["generate"])
+        streaming_llm.generate = AsyncMock(return_value="Cached answer")
+        deps.llm_providers_cache = {"codex": streaming_llm}
+
+        client.post("/generate/stream", json={"query": "honesty", "provider": "codex"})
+        response = client.post("/generate", json={"query": "honesty", "provider": "codex"})
+        events = parse_sse(client.post("/generate/stream", json={"query": "honesty", "provider": "codex"}).text)
+
+        assert response.json()["answer"] == "Cached answer"
+        assert events[1] == ("token", "Cached answer")
+        streaming_llm.generate.assert_called_once()
+
+    def test_stream_cache_insert_error_finishes(self, client, mock_embedding_model, mock_qdrant_manager, caplog):
+        """Test a failing cache insert after streaming still ends with done"""
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+        deps.semantic_cache = MagicMock()
+        deps.semantic_cache.lookup.return_value = None
+        deps.semantic_cache.insert.side_effect = Exception("qdrant down")
+
+        streaming_llm = MagicMock(spec=["generate"])
+        streaming_llm.generate = AsyncMock(return_value="Fresh answer")
+        deps.llm_providers_cache = {"codex": streaming_llm}
+
+        response = client.post("/generate/stream", json={"query": "honesty", "provider": "codex"})
+
+        events = parse_sse(response.text)
+        assert events[1:] == [("token", "Fresh answer"), ("done", {})]
+        assert "Semantic cache insert failed: qdrant down" in caplog.text
+
+    def test_stream_not_initialized(self, client):
+        """Test streaming when system not initialized"""
+        import src.dependencies as deps
+        deps.embedding_model = None
+        deps.qdrant_manager = None
+
+        response = client.post("/generate/stream", json={"query": "test"})
+
+        assert response.status_code == 503
+
+    def test_stream_llm_init_error(self, client, mock_embedding_model, mock_qdrant_manager):
+        """Test provider init failure is reported before streaming starts"""
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+        deps.llm_providers_cache = {}
+
+        with patch.object(deps, 'get_llm_provider', side_effect=Exception("Init failed")):
+            response = client.post("/generate/stream", json={"query": "test"})
+
+        assert response.status_code == 500
+        assert "Failed to initialize" in response.json()['detail']
+
+    def test_stream_search_exception(self, client, mock_embedding_model, mock_qdrant_manager, mock_llm):
+        """Test retrieval errors are reported before streaming starts"""
+        import src.dependencies as deps
+        deps.embedding_model = mock_embedding_model
+        deps.qdrant_manager = mock_qdrant_manager
+        deps.qdrant_manager.search.side_effect = Exception("Search failed")
+        deps.llm_providers_cache = {"ollama:llama3.1:8b": mock_llm}
+
+        response = client.post("/generate/stream", json={"query": "test"})
+
+        assert response.status_code == 500
+
+
+class TestGenerateOnce:
+    """Test coalescing of concurrent identical LLM calls"""
+
+    async def test_concurrent_identical_prompts_share_call(self):
+        """Test concurrent callers with the same prompt trigger one LLM call"""
+        import asyncio
+        from src.handlers.generate import _generate_once, inflight
+
+        release = asyncio.Event()
+
+        async def generate(prompt):
+            await release.wait()
+            return "Shared answer"
+
+        llm = MagicMock()
+        llm.generate = AsyncMock(side_effect=generate)
+
+        tasks = [asyncio.create_task(_generate_once(llm, "codex", "prompt")) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+        assert results == ["Shared answer"] * 3
+        llm.generate.assert_awaited_once()
+        assert inflight == {}
+
+    async def test_different_prompts_not_shared(self):
+        """Test different prompts run separate LLM calls"""
+        import asyncio
+        from src.handlers.generate import _generate_once
+
+        llm = MagicMock()
+        llm.generate = AsyncMock(side_effect=lambda prompt: prompt[-1])
+
+        results = await asyncio.gather(
+            _generate_once(llm, "codex", "prompt a"),
+            _generate_once(llm, "codex", "prompt b")
+        )
+
+        assert results == ["a", "b"]
+        assert llm.generate.await_count == 2
+
+    async def test_exception_propagates_to_waiters(self):
+        """Test LLM errors reach every coalesced caller"""
+        import asyncio
+        from src.handlers.generate import _generate_once, inflight
+
+        release = asyncio.Event()
+
+        async def fail(prompt):
+            await release.wait()
+            raise RuntimeError("LLM crashed")
+
+        llm = MagicMock()
+        llm.generate = AsyncMock(side_effect=fail)
+
+        tasks = [asyncio.create_task(_generate_once(llm, "codex", "prompt")) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        llm.generate.assert_awaited_once()
+        assert inflight == {}
+
+    async def test_first_caller_cancelled(self):
+        """Test cancelling the caller that started the call does not affect other callers"""
+        import asyncio
+        from src.handlers.generate import _generate_once, inflight
+
+        release = asyncio.Event()
+
+        async def generate(prompt):
+            await release.wait()
+            return "Shared answer"
+
+        llm = MagicMock()
+        llm.generate = AsyncMock(side_effect=generate)
+
+        owner = asyncio.create_task(_generate_once(llm, "codex", "prompt"))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(_generate_once(llm, "codex", "prompt"))
+        await asyncio.sleep(0)
+        owner.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await waiter == "Shared answer"
+        assert owner.cancelled()
+        llm.generate.assert_awaited_once()
+        assert inflight == {}
+
+    async def test_all_callers_cancelled(self):
+        """Test the generation finishes and is cleared after every caller leaves"""
+        import asyncio
+        from src.handlers.generate import _generate_once, inflight
+
+        release = asyncio.Event()
+        finished = asyncio.Event()
+
+        async def generate(prompt):
+            await release.wait()
+            finished.set()
+            raise RuntimeError("LLM crashed")
+
+        llm = MagicMock()
+        llm.generate = AsyncMock(side_effect=generate)
+
+        caller = asyncio.create_task(_generate_once(llm, "codex", "prompt"))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.sleep(0)
+        assert len(inflight) == 1
+
+        release.set()
+        await finished.wait()
+        await asyncio.sleep(0)
+
+        assert inflight == {}
+
+
+class TestGetLLM:
+    """Test provider initialization in _get_llm"""
+
+    async def test_concurrent_first_requests_init_once(self):
+        """Test concurrent requests for an uncached provider build it once"""
+        import asyncio
+        import threading
+        import src.dependencies as deps
+        from src.handlers.generate import _get_llm
+
+        deps.llm_providers_cache = {}
+        release = threading.Event()
+        provider = MagicMock()
+
+        def init_provider(provider_name, model):
+            release.wait(5)
+            return provider
+
+        with patch.object(deps, 'get_llm_provider', side_effect=init_provider) as factory:
+            tasks = [asyncio.create_task(_get_llm("codex", None, "codex")) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            release.set()
+            results = await asyncio.gather(*tasks)
+
+        assert results == [provider] * 3
+        factory.assert_called_once_with("codex", None)
+        assert deps.llm_providers_cache == {"codex": provider}
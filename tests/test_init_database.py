@@ -3,6 +3,7 @@
 import pytest
 import numpy as np
 from unittest.mock import patch, mock_open, MagicMock
+from qdrant_client.models import Distance
 from src.init_database import init_fables_collection
 
 
@@ -88,7 +89,7 @@ class TestInitDatabase:
         # Assert
         mock_embedding.encode.assert_called_once()
         mock_qdrant.delete_collection.assert_called_once()
-        mock_qdrant.create_collection.assert_called_once()
+        mock_qdrant.create_collection.assert_called_once_with('fables', vector_size=384, distance=Distance.DOT)
         mock_qdrant.insert_vectors.assert_called_once()
         mock_qdrant.get_collection_info.assert_called_once()
 
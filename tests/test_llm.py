@@ -1,7 +1,46 @@
 """Unit tests for LLM modules"""
 
+import asyncio
+import logging
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
+
+
+@pytest.fixture(autouse=True)
+def mock_which():
+    """Pretend CLIs are installed and reset cached availability checks"""
+    from src.llm import ClaudeCLI, GeminiCLI, CodexCLI, Ollama
+
+    for cls in (ClaudeCLI, GeminiCLI, CodexCLI):
+        cls._checked = False
+    Ollama._models_ts = float("-inf")
+
+    with patch('shutil.which', return_value="/usr/local/bin/cli") as mock:
+        yield mock
+
+    for cls in (ClaudeCLI, GeminiCLI, CodexCLI):
+        cls._checked = False
+    Ollama._models_ts = float("-inf")
+
+
+def make_codex_process(lines, delay=0):
+    """Build a fake asyncio codex process streaming the given stdout lines"""
+    async def stdout():
+        if delay:
+            await asyncio.sleep(delay)
+        for line in lines:
+            yield line
+
+    process = MagicMock()
+    process.stdout = stdout()
+    process.returncode = None
+
+    async def wait():
+        process.returncode = 0
+        return 0
+
+    process.wait = AsyncMock(side_effect=wait)
+    return process
 
 
 class TestOllama:
@@ -90,6 +129,77 @@ class TestOllama:
         with pytest.raises(RuntimeError, match="No models available"):
             Ollama()
 
+    @staticmethod
+    def _list_response(*names):
+        """Build an ollama.list() response with the given model names"""
+        models = []
+        for name in names:
+            mock_model = MagicMock()
+            mock_model.model = name
+            mock_model.size = 1000
+            mock_model.modified_at = "2024-01-01"
+            mock_model.details = None
+            models.append(mock_model)
+
+        mock_response = MagicMock()
+        mock_response.models = models
+        return mock_response
+
+    @patch('src.llm.ollama.ollama')
+    def test_models_cached_across_instances(self, mock_ollama_sdk):
+        """Test model list is fetched once and shared by new instances"""
+        from src.llm.ollama import Ollama
+
+        mock_ollama_sdk.list.return_value = self._list_response("llama3.1:8b")
+
+        Ollama(model="llama3.1:8b")
+        Ollama(model="llama3.1:8b")
+        Ollama()
+
+        mock_ollama_sdk.list.assert_called_once()
+
+    @patch('src.llm.ollama.time.monotonic')
+    @patch('src.llm.ollama.ollama')
+    def test_models_refreshed_after_ttl(self, mock_ollama_sdk, mock_monotonic):
+        """Test model list is fetched again once the TTL expires"""
+        from src.llm.ollama import Ollama
+
+        mock_ollama_sdk.list.return_value = self._list_response("llama3.1:8b")
+
+        mock_monotonic.return_value = 100.0
+        Ollama()
+        mock_monotonic.return_value = 100.0 + Ollama.MODELS_TTL
+        Ollama()
+
+        assert mock_ollama_sdk.list.call_count == 2
+
+    @patch('src.llm.ollama.ollama')
+    def test_unknown_model_refreshes_cache(self, mock_ollama_sdk):
+        """Test a model missing from the cached list triggers a refresh"""
+        from src.llm.ollama import Ollama
+
+        mock_ollama_sdk.list.side_effect = [
+            self._list_response("llama3.1:8b"),
+            self._list_response("llama3.1:8b", "qwen2.5:7b"),
+        ]
+
+        Ollama()
+        oll = Ollama(model="qwen2.5:7b")
+
+        assert oll.model == "qwen2.5:7b"
+        assert mock_ollama_sdk.list.call_count == 2
+
+    @patch('src.llm.ollama.ollama')
+    def test_failed_listing_not_cached(self, mock_ollama_sdk):
+        """Test an unreachable daemon is queried again on the next instance"""
+        from src.llm.ollama import Ollama
+
+        mock_ollama_sdk.list.side_effect = [Exception("Connection error"), self._list_response("llama3.1:8b")]
+
+        with pytest.raises(RuntimeError, match="No models available"):
+            Ollama()
+        assert Ollama().model == "llama3.1:8b"
+
     @patch('src.llm.ollama.ollama')
     def test_format_size(self, mock_ollama_sdk):
         """Test _format_size method"""
@@ -203,7 +313,7 @@ class TestOllama:
             oll.set_model("nonexistent")
 
     @patch('src.llm.ollama.ollama')
-    def test_generate_success(self, mock_ollama_sdk):
+    async def test_generate_success(self, mock_ollama_sdk):
         """Test generate method"""
         from src.llm.ollama import Ollama
 
@@ -216,16 +326,16 @@ class TestOllama:
         mock_response = MagicMock()
         mock_response.models = [mock_model]
         mock_ollama_sdk.list.return_value = mock_response
-        mock_ollama_sdk.generate.return_value = {"response": "Test response"}
+        mock_ollama_sdk.AsyncClient.return_value.generate = AsyncMock(return_value={"response": "Test response"})
 
         oll = Ollama()
-        result = oll.generate("Hello")
+        result = await oll.generate("Hello")
 
         assert result == "Test response"
-        mock_ollama_sdk.generate.assert_called_once()
+        mock_ollama_sdk.AsyncClient.return_value.generate.assert_awaited_once_with(model="test", prompt="Hello")
 
     @patch('src.llm.ollama.ollama')
-    def test_generate_error(self, mock_ollama_sdk):
+    async def test_generate_error(self, mock_ollama_sdk):
         """Test generate handles errors"""
         from src.llm.ollama import Ollama
 
@@ -238,13 +348,188 @@ class TestOllama:
         mock_response = MagicMock()
         mock_response.models = [mock_model]
         mock_ollama_sdk.list.return_value = mock_response
-        mock_ollama_sdk.generate.side_effect = Exception("Generate error")
+        mock_ollama_sdk.AsyncClient.return_value.generate = AsyncMock(side_effect=Exception("Generate error"))
 
         oll = Ollama()
-        result = oll.generate("Hello")
+        result = await oll.generate("Hello")
 
         assert result is None
 
+    @patch('src.llm.ollama.ollama')
+    async def test_agenerate_streams_tokens(self, mock_ollama_sdk):
+        """Test agenerate yields streamed response chunks"""
+        from src.llm.ollama import Ollama
+
+        mock_model = MagicMock()
+        mock_model.model = "test"
+        mock_model.size = 1000
+        mock_model.modified_at = "2024-01-01"
+        mock_model.details = None
+
+        mock_response = MagicMock()
+        mock_response.models = [mock_model]
+        mock_ollama_sdk.list.return_value = mock_response
+
+        async def stream():
+            for chunk in [{"response": "Once"}, {"response": ""}, {"response": " upon"}]:
+                yield chunk
+
+        mock_ollama_sdk.AsyncClient.return_value.generate = AsyncMock(return_value=stream())
+
+        oll = Ollama()
+        tokens = [token async for token in oll.agenerate("Hello")]
+
+        assert tokens == ["Once", " upon"]
+        mock_ollama_sdk.AsyncClient.return_value.generate.assert_awaited_once_with(
+            model="test", prompt="Hello", stream=True
+        )
+
+    @patch('src.llm.ollama.ollama')
+    async def test_generate_session_reuses_context(self, mock_ollama_sdk):
+        """Test session generations feed back the previous context"""
+        from src.llm.ollama import Ollama
+
+        mock_ollama_sdk.list.return_value = self._list_response("test")
+        generate = mock_ollama_sdk.AsyncClient.return_value.generate = AsyncMock(side_effect=[
+            {"response": "First", "context": [1, 2, 3]},
+            {"response": "Second", "context": [1, 2, 3, 4, 5]},
+        ])
+
+        oll = Ollama()
+        assert not oll.has_session("s1")
+        assert await oll.generate("Hello", session_id="s1") == "First"
+        assert oll.has_session("s1")
+        assert await oll.generate("And then?", session_id="s1") == "Second"
+
+        assert generate.await_args_list[0].kwargs == {"model": "test", "prompt": "Hello", "context": None}
+        assert generate.await_args_list[1].kwargs == {"model": "test", "prompt": "And then?", "context": [1, 2, 3]}
+        assert oll._ctx_by_session["s1"] == [1, 2, 3, 4, 5]
+
+    @patch('src.llm.ollama.ollama')
+    async def test_generate_session_lru_eviction(self, mock_ollama_sdk):
+        """Test the least recently used session context is dropped"""
+        from src.llm.ollama import Ollama
+
+        mock_ollama_sdk.list.return_value = self._list_response("test")
+        mock_ollama_sdk.AsyncClient.return_value.generate = AsyncMock(
+            return_value={"response": "Answer", "context": [1]}
+        )
+
+        oll = Ollama()
+        with patch.object(Ollama, 'MAX_SESSIONS', 2):
+            for session_id in ["a", "b", "a", "c"]:
+                await oll.generate("Hello", session_id=session_id)
+
+        assert list(oll._ctx_by_session) == ["a", "c"]
+
+    @patch('src.llm.ollama.ollama')
+    async def test_agenerate_session_stores_context(self, mock_ollama_sdk):
+        """Test streaming keeps the context from the final chunk"""
+        from src.llm.ollama import Ollama
+
+        mock_ollama_sdk.list.return_value = self._list_response("test")
+
+        async def stream():
+            for chunk in [{"response": "Once"}, {"response": "", "done": True, "context": [7, 8]}]:
+                yield chunk
+
+        generate = mock_ollama_sdk.AsyncClient.return_value.generate = AsyncMock(return_value=stream())
+
+        oll = Ollama()
+        tokens = [token async for token in oll.agenerate("Hello", session_id="s1")]
+
+        assert tokens == ["Once"]
+        assert oll._ctx_by_session["s1"] == [7, 8]
+        generate.assert_awaited_once_with(model="test", prompt="Hello", stream=True, context=None)
+
+    @patch('src.llm.ollama.ollama')
+    async def test_async_client_reused(self, mock_ollama_sdk):
+        """Test one AsyncClient is created per instance and shared by all calls"""
+        from src.llm.ollama import Ollama
+
+        mock_ollama_sdk.list.return_value = self._list_response("test")
+
+        async def stream():
+            yield {"response": "Once"}
+
+        client = mock_ollama_sdk.AsyncClient.return_value
+        client.generate = AsyncMock(side_effect=[{"response": "One"}, {"response": "Two"}, stream(), {}])
+
+        oll = Ollama()
+        await oll.generate("Hello")
+        await oll.generate("Again")
+        [token async for token in oll.agenerate("Stream")]
+        await oll.load()
+
+        mock_ollama_sdk.AsyncClient.assert_called_once_with()
+        assert client.generate.await_count == 4
+
+    @patch('src.llm.ollama.ollama')
+    async def test_load(self, mock_ollama_sdk):
+        """Test load sends an empty prompt to pull the model into memory"""
+        from src.llm.ollama import Ollama
+
+        mock_ollama_sdk.list.return_value = self._list_response("test")
+        generate = mock_ollama_sdk.AsyncClient.return_value.generate = AsyncMock(return_value={"response": ""})
+
+        oll = Ollama()
+
+        assert await oll.load() is True
+        generate.assert_awaited_once_with(model="test", prompt="")
+
+    @patch('src.llm.ollama.ollama')
+    async def test_load_error(self, mock_ollama_sdk):
+        """Test load reports failure without raising"""
+        from src.llm.ollama import Ollama
+
+        mock_ollama_sdk.list.return_value = self._list_response("test")
+        mock_ollama_sdk.AsyncClient.return_value.generate = AsyncMock(side_effect=Exception("Daemon down"))
+
+        oll = Ollama()
+
+        assert await oll.load() is False
+
+    @patch('src.llm.ollama.ollama')
+    async def test_agenerate_error(self, mock_ollama_sdk):
+        """Test agenerate surfaces errors instead of ending the stream quietly"""
+        from src.llm.ollama import Ollama
+
+        mock_model = MagicMock()
+        mock_model.model = "test"
+        mock_model.size = 1000
+        mock_model.modified_at = "2024-01-01"
+        mock_model.details = None
+
+        mock_response = MagicMock()
+        mock_response.models = [mock_model]
+        mock_ollama_sdk.list.return_value = mock_response
+        mock_ollama_sdk.AsyncClient.return_value.generate = AsyncMock(side_effect=Exception("Stream error"))
+
+        oll = Ollama()
+        with pytest.raises(Exception, match="Stream error"):
+            [token async for token in oll.agenerate("Hello")]
+
+    @patch('src.llm.ollama.ollama')
+    async def test_agenerate_error_mid_stream(self, mock_ollama_sdk):
+        """Test a stream dying after some tokens raises after yielding them"""
+        from src.llm.ollama import Ollama
+
+        mock_ollama_sdk.list.return_value = self._list_response("test")
+
+        async def stream():
+            yield {"response": "The fox "}
+            raise ConnectionError("Connection reset")
+
+        mock_ollama_sdk.AsyncClient.return_value.generate = AsyncMock(return_value=stream())
+
+        oll = Ollama()
+        tokens = []
+        with pytest.raises(ConnectionError):
+            async for token in oll.agenerate("Hello"):
+                tokens.append(token)
+
+        assert tokens == ["The fox "]
+
     @patch('src.llm.ollama.ollama')
     def test_chat_success(self, mock_ollama_sdk):
         """Test chat method"""
@@ -291,101 +576,114 @@ class TestOllama:
 class TestClaudeCLI:
     """Test ClaudeCLI class"""
 
-    @patch('src.llm.claude_code.subprocess.run')
-    def test_init_available(self, mock_run):
+    def test_init_available(self, mock_which):
         """Test ClaudeCLI initialization when CLI is available"""
         from src.llm.claude_code import ClaudeCLI
 
-        mock_run.return_value = MagicMock(returncode=0)
-
         cli = ClaudeCLI()
         assert cli is not None
 
-    @patch('src.llm.claude_code.subprocess.run')
-    def test_init_not_available(self, mock_run):
+    def test_init_not_available(self, mock_which):
         """Test ClaudeCLI raises error when CLI not available"""
         from src.llm.claude_code import ClaudeCLI
-        import subprocess
 
-        mock_run.side_effect = subprocess.CalledProcessError(1, "which")
+        mock_which.return_value = None
 
         with pytest.raises(RuntimeError, match="not found"):
             ClaudeCLI()
 
-    @patch('src.llm.claude_code.subprocess.run')
-    def test_generate_success_json(self, mock_run):
+    def test_availability_checked_once(self, mock_which):
+        """Test CLI lookup is cached across instances"""
+        from src.llm.claude_code import ClaudeCLI
+
+        ClaudeCLI()
+        ClaudeCLI()
+
+        mock_which.assert_called_once()
+
+    @patch('src.llm.claude_code.run_cli', new_callable=AsyncMock)
+    async def test_generate_success_json(self, mock_run):
         """Test generate with JSON response"""
         from src.llm.claude_code import ClaudeCLI
 
-        # First call for _check_available, second for generate
-        mock_run.side_effect = [
-            MagicMock(returncode=0),  # which claude
-            MagicMock(returncode=0, stdout='{"result": "Test response"}')
-        ]
+        mock_run.return_value = (0, b'{"result": "Test response"}', b"")
 
         cli = ClaudeCLI()
-        result = cli.generate("Hello")
+        result = await cli.generate("Hello")
 
         assert result == "Test response"
 
-    @patch('src.llm.claude_code.subprocess.run')
-    def test_generate_success_raw(self, mock_run):
+    @patch('src.llm.claude_code.run_cli', new_callable=AsyncMock)
+    async def test_generate_utf8_json(self, mock_run):
+        """Test generate decodes non-ASCII JSON output from bytes"""
+        from src.llm.claude_code import ClaudeCLI
+
+        mock_run.return_value = (0, '{"result": "誠實為上策"}'.encode(), b"")
+
+        cli = ClaudeCLI()
+        result = await cli.generate("Hello")
+
+        assert result == "誠實為上策"
+
+    @patch('src.llm.claude_code.run_cli', new_callable=AsyncMock)
+    async def test_generate_with_system_prompt(self, mock_run):
+        """Test generate passes system prompt to the CLI"""
+        from src.llm.claude_code import ClaudeCLI
+
+        mock_run.return_value = (0, b'{"result": "Test response"}', b"")
+
+        cli = ClaudeCLI()
+        await cli.generate("Hello", system="Be brief")
+
+        command = mock_run.call_args[0][0]
+        assert command[-2:] == ["--system-prompt", "Be brief"]
+
+    @patch('src.llm.claude_code.run_cli', new_callable=AsyncMock)
+    async def test_generate_success_raw(self, mock_run):
         """Test generate with raw text response"""
         from src.llm.claude_code import ClaudeCLI
 
-        mock_run.side_effect = [
-            MagicMock(returncode=0),
-            MagicMock(returncode=0, stdout='Raw text response')
-        ]
+        mock_run.return_value = (0, b'Raw text response', b"")
 
         cli = ClaudeCLI()
-        result = cli.generate("Hello")
+        result = await cli.generate("Hello")
 
         assert result == "Raw text response"
 
-    @patch('src.llm.claude_code.subprocess.run')
-    def test_generate_error(self, mock_run):
+    @patch('src.llm.claude_code.run_cli', new_callable=AsyncMock)
+    async def test_generate_error(self, mock_run, caplog):
         """Test generate handles CLI errors"""
         from src.llm.claude_code import ClaudeCLI
 
-        mock_run.side_effect = [
-            MagicMock(returncode=0),
-            MagicMock(returncode=1, stderr="Error")
-        ]
+        mock_run.return_value = (1, b"", b"Error")
 
         cli = ClaudeCLI()
-        result = cli.generate("Hello")
+        result = await cli.generate("Hello")
 
         assert result is None
+        assert caplog.record_tuples == [("src.llm.claude_code", logging.ERROR, "Claude CLI error: Error")]
 
-    @patch('src.llm.claude_code.subprocess.run')
-    def test_generate_timeout(self, mock_run):
+    @patch('src.llm.claude_code.run_cli', new_callable=AsyncMock)
+    async def test_generate_timeout(self, mock_run):
         """Test generate handles timeout"""
         from src.llm.claude_code import ClaudeCLI
-        import subprocess
 
-        mock_run.side_effect = [
-            MagicMock(returncode=0),
-            subprocess.TimeoutExpired("claude", 60)
-        ]
+        mock_run.side_effect = TimeoutError()
 
         cli = ClaudeCLI()
-        result = cli.generate("Hello")
+        result = await cli.generate("Hello")
 
         assert result is None
 
-    @patch('src.llm.claude_code.subprocess.run')
-    def test_generate_exception(self, mock_run):
+    @patch('src.llm.claude_code.run_cli', new_callable=AsyncMock)
+    async def test_generate_exception(self, mock_run):
         """Test generate handles general exceptions"""
         from src.llm.claude_code import ClaudeCLI
 
-        mock_run.side_effect = [
-            MagicMock(returncode=0),
-            Exception("Unknown error")
-        ]
+        mock_run.side_effect = Exception("Unknown error")
 
         cli = ClaudeCLI()
-        result = cli.generate("Hello")
+        result = await cli.generate("Hello")
 
         assert result is None
 
@@ -393,101 +691,89 @@ class TestClaudeCLI:
 class TestGeminiCLI:
     """Test GeminiCLI class"""
 
-    @patch('src.llm.gemini_cli.subprocess.run')
-    def test_init_available(self, mock_run):
+    def test_init_available(self, mock_which):
         """Test GeminiCLI initialization when CLI is available"""
         from src.llm.gemini_cli import GeminiCLI
 
-        mock_run.return_value = MagicMock(returncode=0)
-
         cli = GeminiCLI()
         assert cli is not None
         assert cli.model == "pro"
 
-    @patch('src.llm.gemini_cli.subprocess.run')
-    def test_init_not_available(self, mock_run):
+    def test_init_not_available(self, mock_which):
         """Test GeminiCLI raises error when CLI not available"""
         from src.llm.gemini_cli import GeminiCLI
-        import subprocess
 
-        mock_run.side_effect = subprocess.CalledProcessError(1, "which")
+        mock_which.return_value = None
 
         with pytest.raises(RuntimeError, match="not found"):
             GeminiCLI()
 
-    @patch('src.llm.gemini_cli.subprocess.run')
-    def test_generate_success_json(self, mock_run):
+    def test_availability_checked_once(self, mock_which):
+        """Test CLI lookup is cached across instances"""
+        from src.llm.gemini_cli import GeminiCLI
+
+        GeminiCLI()
+        GeminiCLI()
+
+        mock_which.assert_called_once()
+
+    @patch('src.llm.gemini_cli.run_cli', new_callable=AsyncMock)
+    async def test_generate_success_json(self, mock_run):
         """Test generate with JSON response"""
         from src.llm.gemini_cli import GeminiCLI
 
-        mock_run.side_effect = [
-            MagicMock(returncode=0),
-            MagicMock(returncode=0, stdout='{"response": "Test response"}')
-        ]
+        mock_run.return_value = (0, b'{"response": "Test response"}', b"")
 
         cli = GeminiCLI()
-        result = cli.generate("Hello")
+        result = await cli.generate("Hello")
 
         assert result == "Test response"
 
-    @patch('src.llm.gemini_cli.subprocess.run')
-    def test_generate_success_raw(self, mock_run):
+    @patch('src.llm.gemini_cli.run_cli', new_callable=AsyncMock)
+    async def test_generate_success_raw(self, mock_run):
         """Test generate with raw text response"""
         from src.llm.gemini_cli import GeminiCLI
 
-        mock_run.side_effect = [
-            MagicMock(returncode=0),
-            MagicMock(returncode=0, stdout='Raw text response')
-        ]
+        mock_run.return_value = (0, b'Raw text response', b"")
 
         cli = GeminiCLI()
-        result = cli.generate("Hello")
+        result = await cli.generate("Hello")
 
         assert result == "Raw text response"
 
-    @patch('src.llm.gemini_cli.subprocess.run')
-    def test_generate_error(self, mock_run):
+    @patch('src.llm.gemini_cli.run_cli', new_callable=AsyncMock)
+    async def test_generate_error(self, mock_run):
         """Test generate handles CLI errors"""
         from src.llm.gemini_cli import GeminiCLI
 
-        mock_run.side_effect = [
-            MagicMock(returncode=0),
-            MagicMock(returncode=1)
-        ]
+        mock_run.return_value = (1, b"", b"")
 
         cli = GeminiCLI()
-        result = cli.generate("Hello")
+        result = await cli.generate("Hello")
 
         assert result is None
 
-    @patch('src.llm.gemini_cli.subprocess.run')
-    def test_generate_timeout(self, mock_run):
+    @patch('src.llm.gemini_cli.run_cli', new_callable=AsyncMock)
+    async def test_generate_timeout(self, mock_run):
         """Test generate handles timeout"""
         from src.llm.gemini_cli import GeminiCLI
-        import subprocess
 
-        mock_run.side_effect = [
-            MagicMock(returncode=0),
-            subprocess.TimeoutExpired("gemini", 60)
-        ]
+        mock_run.side_effect = TimeoutError()
 
         cli = GeminiCLI()
-        result = cli.generate("Hello")
+        result = await cli.generate("Hello")
 
         assert result is None
 
-    @patch('src.llm.gemini_cli.subprocess.run')
-    def test_generate_exception(self, mock_run):
+    @patch('src.llm.gemini_cli.run_cli', new_callable=AsyncMock)
+    async def test_generate_exception(self, mock_run):
         """Test generate handles general exceptions"""
         from src.llm.gemini_cli import GeminiCLI
 
-        mock_run.side_effect = [
-            MagicMock(returncode=0),
-            Exception("Unknown error")
-        ]
+        mock_run.side_effect = Exception("Unknown error")
 
         cli = GeminiCLI()
-        result = cli.generate("Hello")
+        result = await cli.generate("Hello")
 
         assert result is None
 
@@ -495,127 +781,236 @@ class TestGeminiCLI:
 class TestCodexCLI:
     """Test CodexCLI class"""
 
-    @patch('src.llm.codex.subprocess.run')
-    def test_init_available(self, mock_run):
+    def test_init_available(self, mock_which):
         """Test CodexCLI initialization when CLI is available"""
         from src.llm.codex import CodexCLI
 
-        mock_run.return_value = MagicMock(returncode=0)
-
         cli = CodexCLI()
         assert cli is not None
 
-    @patch('src.llm.codex.subprocess.run')
-    def test_init_not_available(self, mock_run):
+    def test_init_not_available(self, mock_which):
         """Test CodexCLI raises error when CLI not available"""
         from src.llm.codex import CodexCLI
-        import subprocess
 
-        mock_run.side_effect = subprocess.CalledProcessError(1, "which")
+        mock_which.return_value = None
 
         with pytest.raises(RuntimeError, match="not found"):
             CodexCLI()
 
-    @patch('src.llm.codex.subprocess.Popen')
-    @patch('src.llm.codex.subprocess.run')
-    def test_generate_success(self, mock_run, mock_popen):
-        """Test generate with successful response"""
+    def test_availability_checked_once(self, mock_which):
+        """Test CLI lookup is cached across instances"""
         from src.llm.codex import CodexCLI
 
-        mock_run.return_value = MagicMock(returncode=0)
+        CodexCLI()
+        CodexCLI()
 
-        # Mock codex process
-        mock_codex = MagicMock()
-        mock_codex.stdout = MagicMock()
+        mock_which.assert_called_once()
 
-        # Mock jq process
-        mock_jq = MagicMock()
-        mock_jq.communicate.return_value = ('{"item": {"content": [{"text": "Test response"}]}}', "")
-        mock_jq.returncode = 0
+    @patch('src.llm.codex.asyncio.create_subprocess_exec', new_callable=AsyncMock)
+    async def test_generate_success(self, mock_exec):
+        """Test generate with successful response"""
+        from src.llm.codex import CodexCLI
 
-        mock_popen.side_effect = [mock_codex, mock_jq]
+        mock_codex = make_codex_process([
+            b'{"type": "thread.started"}\n',
+            b'{"type": "item.completed", "item": {"type": "reasoning", "text": "Thinking"}}\n',
+            b'{"type": "item.completed", "item": {"type": "agent_message", "content": [{"text": "Test response"}]}}\n',
+            b'{"type": "turn.completed"}\n'
+        ])
+        mock_exec.return_value = mock_codex
 
         cli = CodexCLI()
-        result = cli.generate("Hello")
+        result = await cli.generate("Hello")
 
         assert result == "Test response"
+        mock_exec.assert_awaited_once()
+        assert mock_exec.call_args[0] == ("codex", "exec", "Hello", "--json")
+        mock_codex.kill.assert_called_once()
+
+    @patch('src.llm.codex.asyncio.create_subprocess_exec', new_callable=AsyncMock)
+    async def test_generate_text_item(self, mock_exec):
+        """Test generate with agent message text field"""
+        from src.llm.codex import CodexCLI
+
+        mock_exec.return_value = make_codex_process([
+            b'not json\n',
+            b'["unexpected"]\n',
+            b'{"type": "item.completed", "item": {"type": "agent_message", "text": "Text response"}}\n'
+        ])
+
+        cli = CodexCLI()
+        result = await cli.generate("Hello")
 
-    @patch('src.llm.codex.subprocess.Popen')
-    @patch('src.llm.codex.subprocess.run')
-    def test_generate_jq_error(self, mock_run, mock_popen):
-        """Test generate handles jq errors"""
+        assert result == "Text response"
+
+    @patch('src.llm.codex.asyncio.create_subprocess_exec', new_callable=AsyncMock)
+    async def test_generate_process_already_exited(self, mock_exec):
+        """Test kill on an exited process is ignored"""
         from src.llm.codex import CodexCLI
 
-        mock_run.return_value = MagicMock(returncode=0)
+        mock_codex = make_codex_process([
+            b'{"type": "item.completed", "item": {"type": "agent_message", "text": "Done"}}\n'
+        ])
+        mock_codex.kill.side_effect = ProcessLookupError()
+        mock_exec.return_value = mock_codex
+
+        cli = CodexCLI()
+        result = await cli.generate("Hello")
 
-        mock_codex = MagicMock()
-        mock_codex.stdout = MagicMock()
+        assert result == "Done"
 
-        mock_jq = MagicMock()
-        mock_jq.communicate.return_value = ("", "Error")
-        mock_jq.returncode = 1
+    @patch('src.llm.codex.asyncio.create_subprocess_exec', new_callable=AsyncMock)
+    async def test_generate_no_agent_message(self, mock_exec):
+        """Test generate returns None when no agent message is emitted"""
+        from src.llm.codex import CodexCLI
 
-        mock_popen.side_effect = [mock_codex, mock_jq]
+        mock_codex = make_codex_process([b'{"type": "turn.failed"}\n'])
+        mock_exec.return_value = mock_codex
 
         cli = CodexCLI()
-        result = cli.generate("Hello")
+        result = await cli.generate("Hello")
 
         assert result is None
+        mock_codex.wait.assert_awaited()
 
-    @patch('src.llm.codex.subprocess.Popen')
-    @patch('src.llm.codex.subprocess.run')
-    def test_generate_timeout(self, mock_run, mock_popen):
-        """Test generate handles timeout"""
+    @patch('src.llm.codex.asyncio.create_subprocess_exec', new_callable=AsyncMock)
+    async def test_generate_does_not_wait_for_graceful_exit(self, mock_exec):
+        """Test generate returns once the message is read even if codex would keep running"""
         from src.llm.codex import CodexCLI
-        import subprocess
 
-        mock_run.return_value = MagicMock(returncode=0)
+        mock_codex = make_codex_process([
+            b'{"type": "item.completed", "item": {"type": "agent_message", "text": "Done"}}\n'
+        ])
+        killed = asyncio.Event()
 
-        mock_codex = MagicMock()
-        mock_codex.stdout = MagicMock()
+        async def wait():
+            await killed.wait()
+            mock_codex.returncode = -9
+            return -9
 
-        mock_jq = MagicMock()
-        mock_jq.communicate.side_effect = subprocess.TimeoutExpired("jq", 60)
+        mock_codex.kill.side_effect = killed.set
+        mock_codex.wait = AsyncMock(side_effect=wait)
+        mock_exec.return_value = mock_codex
 
-        mock_popen.side_effect = [mock_codex, mock_jq]
+        cli = CodexCLI()
+        result = await asyncio.wait_for(cli.generate("Hello"), 1)
+
+        assert result == "Done"
+        mock_codex.kill.assert_called_once()
+
+    @patch('src.llm.codex.asyncio.create_subprocess_exec', new_callable=AsyncMock)
+    async def test_generate_timeout(self, mock_exec):
+        """Test generate kills codex and returns None on timeout"""
+        from src.llm.codex import CodexCLI
+
+        mock_codex = make_codex_process([], delay=10)
+        mock_exec.return_value = mock_codex
 
         cli = CodexCLI()
-        result = cli.generate("Hello")
+        result = await cli.generate("Hello", timeout=0.01)
 
         assert result is None
+        mock_codex.kill.assert_called_once()
+        mock_codex.wait.assert_awaited()
 
-    @patch('src.llm.codex.subprocess.Popen')
-    @patch('src.llm.codex.subprocess.run')
-    def test_generate_exception(self, mock_run, mock_popen):
-        """Test generate handles general exceptions"""
+    @patch('src.llm.codex.asyncio.create_subprocess_exec', new_callable=AsyncMock)
+    async def test_generate_read_error_kills_process(self, mock_exec):
+        """Test a stdout read error kills codex before returning"""
         from src.llm.codex import CodexCLI
 
-        mock_run.return_value = MagicMock(returncode=0)
-        mock_popen.side_effect = Exception("Unknown error")
+        async def stdout():
+            raise ValueError("Separator is found, but chunk is longer than limit")
+            yield
+
+        mock_codex = make_codex_process([])
+        mock_codex.stdout = stdout()
+        mock_exec.return_value = mock_codex
 
         cli = CodexCLI()
-        result = cli.generate("Hello")
+        result = await cli.generate("Hello")
 
         assert result is None
+        mock_codex.kill.assert_called_once()
+        assert mock_codex.returncode == 0
 
-    @patch('src.llm.codex.subprocess.Popen')
-    @patch('src.llm.codex.subprocess.run')
-    def test_generate_raw_output(self, mock_run, mock_popen):
-        """Test generate with raw output (non-JSON)"""
+    @patch('src.llm.codex.asyncio.create_subprocess_exec', new_callable=AsyncMock)
+    async def test_generate_cancelled_kills_process(self, mock_exec):
+        """Test cancelling generate kills codex"""
         from src.llm.codex import CodexCLI
 
-        mock_run.return_value = MagicMock(returncode=0)
+        mock_codex = make_codex_process([], delay=10)
+        mock_exec.return_value = mock_codex
 
-        mock_codex = MagicMock()
-        mock_codex.stdout = MagicMock()
+        cli = CodexCLI()
+        task = asyncio.create_task(cli.generate("Hello"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        mock_codex.kill.assert_called_once()
+        mock_codex.wait.assert_awaited()
 
-        mock_jq = MagicMock()
-        mock_jq.communicate.return_value = ("Raw output", "")
-        mock_jq.returncode = 0
+    @patch('src.llm.codex.asyncio.create_subprocess_exec', new_callable=AsyncMock)
+    async def test_generate_exception(self, mock_exec):
+        """Test generate handles general exceptions"""
+        from src.llm.codex import CodexCLI
 
-        mock_popen.side_effect = [mock_codex, mock_jq]
+        mock_exec.side_effect = Exception("Unknown error")
 
         cli = CodexCLI()
-        result = cli.generate("Hello")
+        result = await cli.generate("Hello")
+
+        assert result is None
+
+
+class TestRunCli:
+    """Test shared CLI subprocess runner"""
+
+    async def test_run_cli_success(self):
+        """Test run_cli returns exit code and raw output"""
+        import sys
+        from src.llm.cli_runner import run_cli
+
+        returncode, stdout, stderr = await run_cli(
+            [sys.executable, "-c", "import sys; print('out'); print('err', file=sys.stderr); sys.exit(3)"],
+            timeout=30
+        )
+
+        assert returncode == 3
+        assert stdout.strip() == b"out"
+        assert stderr.strip() == b"err"
+
+    async def test_run_cli_timeout(self):
+        """Test run_cli kills the process and raises on timeout"""
+        import sys
+        from src.llm.cli_runner import run_cli
+
+        with pytest.raises(TimeoutError):
+            await run_cli([sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.5)
+
+    async def test_run_cli_cancelled_kills_process(self):
+        """Test cancelling run_cli does not leave the child running"""
+        import sys
+        from src.llm import cli_runner
+
+        processes = []
+        create = asyncio.create_subprocess_exec
+
+        async def spawn(*args, **kwargs):
+            process = await create(*args, **kwargs)
+            processes.append(process)
+            return process
+
+        with patch.object(cli_runner.asyncio, 'create_subprocess_exec', side_effect=spawn):
+            task = asyncio.create_task(
+                cli_runner.run_cli([sys.executable, "-c", "import time; time.sleep(30)"], timeout=30)
+            )
+            while not processes:
+                await asyncio.sleep(0.01)
+            task.cancel()
+
+            with pytest.raises(asyncio.CancelledError):
+                await task
 
-        assert result == "Raw output"
+        assert processes[0].returncode is not None
@@ -1,8 +1,9 @@
 """Unit tests for main FastAPI application"""
 
+import asyncio
 import pytest
 import numpy as np
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from fastapi.testclient import TestClient
 from src.main import app
 
@@ -68,10 +69,16 @@ def mock_qdrant_manager_instance():
 class TestLifecycleEvents:
     """Test application lifecycle events"""
 
+    @pytest.fixture(autouse=True)
+    def mock_warm_llm_providers(self):
+        """Skip provider warm-up in lifecycle tests"""
+        with patch('src.main.warm_llm_providers', new_callable=AsyncMock) as mock:
+            yield mock
+
     @pytest.mark.asyncio
     @patch('src.dependencies.EmbeddingModel')
     @patch('src.dependencies.QdrantManager')
-    async def test_startup_event_success(self, mock_qdrant_cls, mock_emb_cls):
+    async def test_startup_event_success(self, mock_qdrant_cls, mock_emb_cls, mock_warm_llm_providers):
         """Test successful startup event"""
         # Arrange
         mock_emb = MagicMock()
@@ -86,12 +93,15 @@ class TestLifecycleEvents:
         mock_qdrant_cls.return_value = mock_qdrant
 
         # Import and run startup event
-        from src.main import startup_event
+        from src.main import startup_event, shutdown_event
         await startup_event()
 
         # Assert
         mock_emb_cls.assert_called_once()
         mock_qdrant_cls.assert_called_once()
+        mock_warm_llm_providers.assert_awaited_once()
+
+        await shutdown_event()
 
     @pytest.mark.asyncio
     @patch('src.dependencies.EmbeddingModel')
@@ -106,12 +116,126 @@ class TestLifecycleEvents:
         mock_qdrant_cls.return_value = mock_qdrant
 
         # Import and run startup event
-        from src.main import startup_event
+        from src.main import startup_event, shutdown_event
         await startup_event()
 
         # Assert - should complete without errors
         mock_qdrant.get_collection_info.assert_called_once()
 
+        await shutdown_event()
+
+
+    @pytest.mark.asyncio
+    @patch('src.dependencies.EmbeddingModel')
+    @patch('src.dependencies.QdrantManager')
+    async def test_startup_starts_and_shutdown_stops_purge_task(self, mock_qdrant_cls, mock_emb_cls):
+        """Test semantic cache purge task lifecycle"""
+        import src.main as main_module
+
+        await main_module.startup_event()
+        task = main_module.purge_task
+        assert task is not None and not task.done()
+
+        await main_module.shutdown_event()
+        assert task.cancelled()
+        assert main_module.purge_task is None
+
+    @pytest.mark.asyncio
+    @patch('src.dependencies.EmbeddingModel')
+    @patch('src.dependencies.QdrantManager')
+    async def test_repeated_startup_replaces_purge_task(self, mock_qdrant_cls, mock_emb_cls):
+        """Test a second startup cancels the previous purge task instead of leaking it"""
+        import src.main as main_module
+
+        await main_module.startup_event()
+        first = main_module.purge_task
+        await main_module.startup_event()
+
+        assert first.cancelled()
+        assert main_module.purge_task is not first and not main_module.purge_task.done()
+
+        await main_module.shutdown_event()
+
+    @pytest.mark.asyncio
+    async def test_purge_semantic_cache_loop(self, caplog):
+        """Test purge loop purges periodically and survives errors"""
+        import src.dependencies as deps
+        import src.main as main_module
+
+        deps.semantic_cache = MagicMock()
+        deps.semantic_cache.purge_expired.side_effect = [Exception("Qdrant down"), None, None]
+
+        with patch.object(main_module, 'SEMANTIC_CACHE_PURGE_INTERVAL', 0):
+            task = asyncio.create_task(main_module.purge_semantic_cache())
+            while deps.semantic_cache.purge_expired.call_count < 3:
+                await asyncio.sleep(0.01)
+            task.cancel()
+
+        assert deps.semantic_cache.purge_expired.call_count >= 3
+        assert "Semantic cache purge failed: Qdrant down" in caplog.text
+
+    def test_log_level_case_insensitive(self, monkeypatch):
+        """Test a lowercase LOG_LEVEL is normalized to a valid logging level"""
+        import importlib
+        import logging
+        import src.config as config
+
+        monkeypatch.setenv("LOG_LEVEL", "debug")
+        try:
+            importlib.reload(config)
+            assert config.LOG_LEVEL == "DEBUG"
+            logging.getLogger("test").setLevel(config.LOG_LEVEL)
+        finally:
+            monkeypatch.undo()
+            importlib.reload(config)
+
+
+class TestWarmLLMProviders:
+    """Test startup warm-up of LLM providers"""
+
+    @pytest.fixture(autouse=True)
+    def empty_provider_cache(self):
+        """Start each test with no cached providers"""
+        import src.dependencies as deps
+        deps.llm_providers_cache = {}
+        yield
+        deps.llm_providers_cache = {}
+
+    @pytest.mark.asyncio
+    async def test_warm_caches_providers_and_loads_ollama(self):
+        """Test each configured provider is cached under its request cache key"""
+        import src.dependencies as deps
+        import src.main as main_module
+
+        ollama_llm = MagicMock()
+        ollama_llm.load = AsyncMock(return_value=True)
+        codex_llm = MagicMock()
+
+        with patch.object(main_module, 'LLM_PROVIDERS', ["ollama", "codex"]), \
+             patch.object(main_module, 'OLLAMA_MODELS', ["llama3.1:8b", "qwen2.5:7b"]), \
+             patch.object(deps, 'get_llm_provider', side_effect=[ollama_llm, codex_llm]) as factory:
+            await main_module.warm_llm_providers()
+
+        assert factory.call_args_list[0].args == ("ollama", "llama3.1:8b")
+        assert factory.call_args_list[1].args == ("codex", None)
+        assert deps.llm_providers_cache == {"ollama:llama3.1:8b": ollama_llm, "codex": codex_llm}
+        ollama_llm.load.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_warm_skips_failing_provider(self, caplog):
+        """Test a provider that fails to initialize is logged and skipped"""
+        import src.dependencies as deps
+        import src.main as main_module
+
+        gemini_llm = MagicMock()
+
+        with patch.object(main_module, 'LLM_PROVIDERS', ["claude_code", "gemini_cli"]), \
+             patch.object(deps, 'get_llm_provider', side_effect=[RuntimeError("claude not found"), gemini_llm]):
+            await main_module.warm_llm_providers()
+
+        assert deps.llm_providers_cache == {"gemini_cli": gemini_llm}
+        assert "Could not initialize LLM provider claude_code: claude not found" in caplog.text
+
 
 class TestRootEndpoint:
     """Test root endpoint"""
@@ -128,6 +252,13 @@ class TestRootEndpoint:
         assert "docs" in data
         assert data["docs"] == "/docs"
 
+    def test_responses_encoded_with_orjson(self):
+        """Test the app renders JSON responses with orjson"""
+        from fastapi.responses import ORJSONResponse
+        from src.main import app
+
+        assert app.router.default_response_class is ORJSONResponse
+
 
 class TestHealthCheckEndpoint:
     """Test health check endpoint"""
@@ -221,6 +352,23 @@ class TestSearchEndpoint:
         assert data['total_results'] >= 1
         assert 'title' in data['results'][0]
         assert 'score' in data['results'][0]
+        assert mock_qdrant_manager_instance.search.call_args[1]['with_payload'] == [
+            'title', 'content', 'moral', 'language', 'word_count'
+        ]
+
+    def test_search_response_matches_model(self, client, mock_embedding_model_instance, mock_qdrant_manager_instance):
+        """Test the directly encoded body matches SearchResponse and stays documented"""
+        import src.dependencies as deps_module
+        from src.models import SearchResponse
+        deps_module.embedding_model = mock_embedding_model_instance
+        deps_module.qdrant_manager = mock_qdrant_manager_instance
+
+        response = client.post("/search", json={"query": "honesty story"})
+
+        assert SearchResponse.model_validate(response.json()).total_results == 1
+        schema = client.get("/openapi.json").json()
+        ok = schema["paths"]["/search"]["post"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert ok == {"$ref": "#/components/schemas/SearchResponse"}
 
     def test_search_with_threshold(self, client, mock_embedding_model_instance, mock_qdrant_manager_instance):
         """Test search with score threshold"""
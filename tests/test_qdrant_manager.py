@@ -248,7 +248,8 @@ class TestQdrantManager:
             collection_name='test_collection',
             query_vector=query_vector,
             limit=5,
-            score_threshold=None
+            score_threshold=None,
+            with_payload=True
         )
 
     @patch('src.qdrant_manager.QdrantClient')
@@ -275,7 +276,8 @@ class TestQdrantManager:
             collection_name='test_collection',
             query_vector=query_vector,
             limit=5,
-            score_threshold=0.8
+            score_threshold=0.8,
+            with_payload=True
         )
 
     @patch('src.qdrant_manager.QdrantClient')
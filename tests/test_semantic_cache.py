@@ -0,0 +1,253 @@
+"""Unit tests for semantic cache module"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import numpy as np
+from unittest.mock import patch, MagicMock
+from qdrant_client.models import Distance
+from src.models import FableResult
+from src.semantic_cache import SemanticCache, QdrantSemanticCache
+
+
+@pytest.fixture
+def cache():
+    """Create semantic cache with small limits"""
+    return SemanticCache(threshold=0.9, ttl=60, max_size=2)
+
+
+class TestSemanticCache:
+    """Test SemanticCache class"""
+
+    def test_lookup_empty(self, cache):
+        """Test lookup on empty cache returns None"""
+        assert cache.lookup("ollama", np.ones(4)) is None
+
+    def test_insert_and_hit(self, cache):
+        """Test exact vector hits the cache"""
+        vector = np.array([1.0, 2.0, 3.0, 4.0])
+        cache.insert("ollama", vector, "answer", ["source"])
+
+        entry = cache.lookup("ollama", vector)
+
+        assert entry["answer"] == "answer"
+        assert entry["sources"] == ["source"]
+
+    def test_similar_vector_hits(self, cache):
+        """Test vector above similarity threshold hits the cache"""
+        cache.insert("ollama", np.array([1.0, 0.0, 0.0]), "answer", [])
+
+        entry = cache.lookup("ollama", np.array([0.99, 0.05, 0.0]))
+
+        assert entry is not None
+
+    def test_dissimilar_vector_misses(self, cache):
+        """Test vector below similarity threshold misses"""
+        cache.insert("ollama", np.array([1.0, 0.0, 0.0]), "answer", [])
+
+        assert cache.lookup("ollama", np.array([0.0, 1.0, 0.0])) is None
+
+    def test_namespaces_isolated(self, cache):
+        """Test entries are not shared between namespaces"""
+        vector = np.array([1.0, 0.0])
+        cache.insert("ollama", vector, "answer", [])
+
+        assert cache.lookup("codex", vector) is None
+
+    def test_best_match_returned(self, cache):
+        """Test most similar entry is returned"""
+        cache.insert("ollama", np.array([1.0, 0.0, 0.0]), "first", [])
+        cache.insert("ollama", np.array([0.0, 1.0, 0.0]), "second", [])
+
+        entry = cache.lookup("ollama", np.array([0.05, 1.0, 0.0]))
+
+        assert entry["answer"] == "second"
+
+    def test_lru_eviction(self, cache):
+        """Test least recently used entry is evicted when full"""
+        a, b, c = np.eye(3)
+        cache.insert("ollama", a, "a", [])
+        cache.insert("ollama", b, "b", [])
+        cache.lookup("ollama", a)  # Mark 'a' as recently used
+        cache.insert("ollama", c, "c", [])
+
+        assert len(cache) == 2
+        assert cache.lookup("ollama", a)["answer"] == "a"
+        assert cache.lookup("ollama", b) is None
+
+    def test_expired_entry_misses(self, cache):
+        """Test entries older than TTL are dropped"""
+        vector = np.array([1.0, 0.0])
+        with patch('src.semantic_cache.time.monotonic', return_value=0.0):
+            cache.insert("ollama", vector, "answer", [])
+
+        with patch('src.semantic_cache.time.monotonic', return_value=61.0):
+            assert cache.lookup("ollama", vector) is None
+
+        assert len(cache) == 0
+
+    def test_zero_vector(self, cache):
+        """Test zero vector does not raise"""
+        cache.insert("ollama", np.array([1.0, 0.0]), "answer", [])
+
+        assert cache.lookup("ollama", np.zeros(2)) is None
+
+    def test_clear(self, cache):
+        """Test clear removes all entries"""
+        cache.insert("ollama", np.array([1.0, 0.0]), "answer", [])
+        cache.clear()
+
+        assert len(cache) == 0
+        assert cache.lookup("ollama", np.array([1.0, 0.0])) is None
+
+    def test_purge_expired(self, cache):
+        """Test purge_expired drops expired entries across namespaces"""
+        with patch('src.semantic_cache.time.monotonic', return_value=0.0):
+            cache.insert("ollama", np.array([1.0, 0.0]), "old", [])
+            cache.insert("codex", np.array([1.0, 0.0]), "old", [])
+        with patch('src.semantic_cache.time.monotonic', return_value=30.0):
+            cache.insert("codex", np.array([0.0, 1.0]), "new", [])
+
+        with patch('src.semantic_cache.time.monotonic', return_value=61.0):
+            cache.purge_expired()
+
+        assert len(cache) == 1
+
+    def test_concurrent_access_from_threads(self):
+        """Test lookups, inserts and purges from several threads do not corrupt the cache"""
+        cache = SemanticCache(threshold=0.5, ttl=0.001, max_size=8)
+        stop = threading.Event()
+        rng = np.random.default_rng(0)
+        vectors = rng.random((16, 4))
+
+        def writer():
+            for i in range(2000):
+                cache.insert("ollama", vectors[i % 16], "answer", [])
+                cache.lookup("ollama", vectors[(i * 7) % 16])
+
+        def purger():
+            while not stop.is_set():
+                cache.purge_expired()
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            purge = pool.submit(purger)
+            writers = [pool.submit(writer) for _ in range(3)]
+            try:
+                for future in writers:
+                    future.result()
+            finally:
+                stop.set()
+            purge.result()
+
+        assert len(cache) <= 8
+
+
+@pytest.fixture
+def mock_qdrant_manager():
+    """Mock QdrantManager with existing cache collection"""
+    manager = MagicMock()
+    manager.client.collection_exists.return_value = True
+    return manager
+
+
+@pytest.fixture
+def sample_source():
+    """Sample FableResult used as cache source"""
+    return FableResult(
+        id=1, title="The Fox", content="A fox.", moral="Be wise.",
+        score=0.9, language="en", word_count=3
+    )
+
+
+class TestQdrantSemanticCache:
+    """Test QdrantSemanticCache class"""
+
+    def test_creates_collection_if_missing(self, mock_qdrant_manager):
+        """Test cache collection and payload indexes are created when missing"""
+        mock_qdrant_manager.client.collection_exists.return_value = False
+
+        QdrantSemanticCache(mock_qdrant_manager, "llm_cache", vector_size=384)
+
+        mock_qdrant_manager.create_collection.assert_called_once_with(
+            "llm_cache", 384, distance=Distance.DOT
+        )
+        assert mock_qdrant_manager.client.create_payload_index.call_count == 2
+
+    def test_existing_collection_reused(self, mock_qdrant_manager):
+        """Test existing cache collection is not recreated"""
+        QdrantSemanticCache(mock_qdrant_manager, "llm_cache", vector_size=384)
+
+        mock_qdrant_manager.create_collection.assert_not_called()
+
+    def test_lookup_hit(self, mock_qdrant_manager, sample_source):
+        """Test lookup returns answer and FableResult sources from payload"""
+        hit = MagicMock()
+        hit.payload = {"answer": "cached", "sources": [sample_source.model_dump()], "ts": 1.0}
+        mock_qdrant_manager.client.search.return_value = [hit]
+        cache = QdrantSemanticCache(mock_qdrant_manager, "llm_cache", vector_size=2, threshold=0.9)
+
+        entry = cache.lookup(("ollama", 3), np.array([1.0, 0.0]))
+
+        assert entry["answer"] == "cached"
+        assert entry["sources"] == [sample_source]
+        kwargs = mock_qdrant_manager.client.search.call_args[1]
+        assert kwargs["collection_name"] == "llm_cache"
+        assert kwargs["score_threshold"] == 0.9
+        assert kwargs["limit"] == 1
+        namespace_filter = kwargs["query_filter"].must[0]
+        assert namespace_filter.match.value == '["ollama", 3]'
+
+    def test_lookup_miss(self, mock_qdrant_manager):
+        """Test lookup returns None without hits"""
+        mock_qdrant_manager.client.search.return_value = []
+        cache = QdrantSemanticCache(mock_qdrant_manager, "llm_cache", vector_size=2)
+
+        assert cache.lookup("ollama", np.array([1.0, 0.0])) is None
+
+    def test_lookup_filters_expired(self, mock_qdrant_manager):
+        """Test lookup only matches entries newer than the TTL"""
+        mock_qdrant_manager.client.search.return_value = []
+        cache = QdrantSemanticCache(mock_qdrant_manager, "llm_cache", vector_size=2, ttl=60)
+
+        with patch('src.semantic_cache.time.time', return_value=1000.0):
+            cache.lookup("ollama", np.array([1.0, 0.0]))
+
+        ts_filter = mock_qdrant_manager.client.search.call_args[1]["query_filter"].must[1]
+        assert ts_filter.range.gte == 940.0
+
+    def test_insert(self, mock_qdrant_manager, sample_source):
+        """Test insert upserts a point with serialized payload"""
+        cache = QdrantSemanticCache(mock_qdrant_manager, "llm_cache", vector_size=2)
+
+        with patch('src.semantic_cache.time.time', return_value=1000.0):
+            cache.insert(("ollama", 3), np.array([1.0, 0.0]), "answer", [sample_source])
+
+        point = mock_qdrant_manager.client.upsert.call_args[1]["points"][0]
+        assert point.vector == [1.0, 0.0]
+        assert point.payload == {
+            "namespace": '["ollama", 3]',
+            "answer": "answer",
+            "sources": [sample_source.model_dump()],
+            "ts": 1000.0,
+        }
+
+    def test_purge_expired(self, mock_qdrant_manager):
+        """Test purge deletes points older than the TTL"""
+        cache = QdrantSemanticCache(mock_qdrant_manager, "llm_cache", vector_size=2, ttl=60)
+
+        with patch('src.semantic_cache.time.time', return_value=1000.0):
+            cache.purge_expired()
+
+        selector = mock_qdrant_manager.client.delete.call_args[1]["points_selector"]
+        assert selector.filter.must[0].range.lt == 940.0
+
+    def test_clear_and_len(self, mock_qdrant_manager):
+        """Test clear deletes all points and len counts them"""
+        mock_qdrant_manager.client.count.return_value = MagicMock(count=5)
+        cache = QdrantSemanticCache(mock_qdrant_manager, "llm_cache", vector_size=2)
+
+        cache.clear()
+
+        mock_qdrant_manager.client.delete.assert_called_once()
+        assert len(cache) == 5